@@ -0,0 +1,352 @@
+"""Headless OpenAI-compatible transcription endpoint
+
+Serves POST /v1/audio/transcriptions on localhost so other tools on the
+machine can use the local Whisper model without the floating window.
+Requests are queued and concurrent ones are decoded together in batched
+forward passes on the one model; when the queue is full new requests get
+429 so callers back off instead of piling up. GET /metrics reports queue
+depth and batch sizes in Prometheus text format.
+
+Usage:
+    uv run python api_server.py [--port 8000] [--max-batch 8]
+
+    curl http://127.0.0.1:8000/v1/audio/transcriptions -F file=@clip.wav
+"""
+import argparse
+import io
+import json
+import queue
+import threading
+import time
+import wave
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from audio_utils import WHISPER_SAMPLE_RATE, to_whisper_audio
+from transcript_cache import TranscriptCache
+from transcription import load_whisper_model, transcribe_batch
+
+MODEL_NAME = "large-v3-turbo"
+# Same upload limit as the hosted API
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+# Clips up to one Whisper window can share a batched decode
+MAX_BATCH_SECONDS = 30
+REQUEST_TIMEOUT_S = 300
+
+
+class Job:
+    """One queued transcription request"""
+
+    def __init__(self, audio, prompt=None, language=None):
+        self.audio = audio
+        self.prompt = prompt
+        self.language = language
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class BatchScheduler:
+    """Single inference thread that drains the queue in batches
+
+    After the first job arrives it waits up to max_wait_ms for more, then
+    decodes up to max_batch clips together. Under load batches fill up
+    immediately, so throughput grows with concurrency instead of requests
+    running one after another.
+    """
+
+    def __init__(self, model, device, max_batch=8, max_wait_ms=20, max_queue=32):
+        self.model = model
+        self.fp16 = device == "cuda"
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.in_flight = 0
+        self.requests_total = 0
+        self.rejected_total = 0
+        self.errors_total = 0
+        self.batches_total = 0
+        self.batched_clips_total = 0
+        self.queue_wait_seconds = 0.0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def submit(self, job):
+        """Queue a job; raises queue.Full when the server is saturated"""
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            self.rejected_total += 1
+            raise
+        self.requests_total += 1
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            self.in_flight = len(batch)
+            start = time.perf_counter()
+            for job in batch:
+                self.queue_wait_seconds += start - job.enqueued
+            self._process(batch)
+            print(
+                f"[BATCH] {len(batch)} request(s) in {(time.perf_counter() - start) * 1000:.0f}ms "
+                f"(queue {self.queue.qsize()})"
+            )
+            self.in_flight = 0
+
+    def _process(self, batch):
+        groups = {}
+        single = []
+        for job in batch:
+            if len(job.audio) <= MAX_BATCH_SECONDS * WHISPER_SAMPLE_RATE:
+                # Prompt and language are per decode call, so only equal ones share a batch
+                groups.setdefault((job.prompt, job.language), []).append(job)
+            else:
+                single.append(job)
+
+        for (prompt, language), jobs in groups.items():
+            try:
+                results = transcribe_batch(
+                    self.model, [job.audio for job in jobs], prompt=prompt, language=language, fp16=self.fp16,
+                )
+            except Exception as e:
+                self._fail(jobs, e)
+                continue
+            self.batches_total += 1
+            self.batched_clips_total += len(jobs)
+            for job, result in zip(jobs, results):
+                if result is None:
+                    single.append(job)
+                else:
+                    self._finish(job, result)
+
+        for job in single:
+            try:
+                result = self.model.transcribe(
+                    job.audio, fp16=self.fp16, initial_prompt=job.prompt, language=job.language,
+                )
+            except Exception as e:
+                self._fail([job], e)
+                continue
+            self._finish(job, result)
+
+    def _finish(self, job, result):
+        job.result = result
+        job.done.set()
+
+    def _fail(self, jobs, error):
+        print(f"[WARNING] Transcription failed: {error}")
+        self.errors_total += len(jobs)
+        for job in jobs:
+            job.error = error
+            job.done.set()
+
+    def metrics_text(self):
+        """Prometheus text exposition of the queue and batch counters"""
+        metrics = [
+            ("faststt_queue_depth", "gauge", "Requests waiting for the model", self.queue.qsize()),
+            ("faststt_queue_capacity", "gauge", "Maximum queued requests before 429", self.queue.maxsize),
+            ("faststt_in_flight", "gauge", "Requests in the batch being decoded", self.in_flight),
+            ("faststt_requests_total", "counter", "Accepted transcription requests", self.requests_total),
+            ("faststt_rejected_total", "counter", "Requests rejected with 429", self.rejected_total),
+            ("faststt_errors_total", "counter", "Requests that failed during decoding", self.errors_total),
+            ("faststt_batches_total", "counter", "Batched forward passes", self.batches_total),
+            ("faststt_batched_clips_total", "counter", "Clips decoded in batched passes", self.batched_clips_total),
+            ("faststt_queue_wait_seconds_total", "counter", "Time requests spent queued", self.queue_wait_seconds),
+        ]
+        lines = []
+        for name, kind, help_text, value in metrics:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+def parse_multipart(content_type, body):
+    """Split a multipart/form-data body into (fields, files)"""
+    message = BytesParser(policy=HTTP).parsebytes(
+        b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body
+    )
+    fields, files = {}, {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        payload = part.get_payload(decode=True) or b""
+        if part.get_filename() is not None:
+            files[name] = (part.get_filename(), part.get_content_type(), payload)
+        else:
+            fields[name] = payload.decode()
+    return fields, files
+
+
+def decode_upload(data, filename="", content_type="", sample_rate=WHISPER_SAMPLE_RATE):
+    """Decode a WAV file or raw 16-bit mono PCM into Whisper's input format"""
+    if data[:4] == b"RIFF":
+        with wave.open(io.BytesIO(data)) as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError("only 16-bit PCM WAV files are supported")
+            if wav.getframerate() <= 0:
+                raise ValueError(f"invalid WAV sample rate {wav.getframerate()}")
+            pcm = np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2")
+            return to_whisper_audio(pcm.reshape(-1, wav.getnchannels()), wav.getframerate())
+    if content_type in ("audio/pcm", "audio/l16") or filename.endswith((".pcm", ".raw")):
+        if sample_rate <= 0:
+            raise ValueError(f"invalid sample_rate {sample_rate}")
+        pcm = np.frombuffer(data[:len(data) - len(data) % 2], dtype="<i2")
+        return to_whisper_audio(pcm, sample_rate)
+    raise ValueError("unsupported audio format: send WAV or raw 16-bit PCM (audio/pcm)")
+
+
+class TranscriptionHandler(BaseHTTPRequestHandler):
+    server_version = "FastSimple"
+
+    def log_message(self, format, *args):
+        print(f"[API] {self.address_string()} {format % args}")
+
+    def _reply(self, status, body, content_type="application/json", headers=None):
+        if not isinstance(body, bytes):
+            body = (json.dumps(body) if content_type == "application/json" else body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message, kind="invalid_request_error", headers=None):
+        self._reply(status, {"error": {"message": message, "type": kind}}, headers=headers)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/metrics":
+            self._reply(200, self.server.scheduler.metrics_text(), "text/plain; version=0.0.4")
+        elif path == "/health":
+            self._reply(200, {"status": "ok", "queue_depth": self.server.scheduler.queue.qsize()})
+        else:
+            self._error(404, f"Unknown path {path}")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/v1/audio/transcriptions":
+            self._error(404, f"Unknown path {url.path}")
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        if length > MAX_UPLOAD_BYTES:
+            self._error(413, f"Upload exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+            return
+        body = self.rfile.read(length)
+
+        content_type = self.headers.get("Content-Type", "")
+        try:
+            if content_type.startswith("multipart/form-data"):
+                fields, files = parse_multipart(content_type, body)
+                if "file" not in files:
+                    self._error(400, "Missing 'file' field")
+                    return
+                filename, file_type, data = files["file"]
+            else:
+                # Raw upload: the body is the audio, options go in the query string
+                fields = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                filename, file_type, data = "", content_type.split(";")[0].strip(), body
+            audio = decode_upload(
+                data, filename, file_type, int(fields.get("sample_rate", WHISPER_SAMPLE_RATE)),
+            )
+        except (ValueError, wave.Error, EOFError) as e:
+            self._error(400, str(e))
+            return
+
+        response_format = fields.get("response_format", "json")
+        if response_format not in ("json", "text", "verbose_json"):
+            self._error(400, f"Unsupported response_format '{response_format}'")
+            return
+
+        job = Job(audio, fields.get("prompt") or None, fields.get("language") or None)
+        cache = self.server.cache
+        key = None
+        if cache is not None:
+            # Clips up to MAX_BATCH_SECONDS always go through transcribe_batch
+            path = "batched_clip" if len(audio) <= MAX_BATCH_SECONDS * WHISPER_SAMPLE_RATE else "full"
+            key = cache.transcript_key(
+                audio, self.server.model_name, self.server.device, path=path,
+                prompt=job.prompt, language=job.language,
+            )
+            job.result = cache.get(key)
+            print(f"[CACHE] {'Hit' if job.result is not None else 'Miss'} ({cache.stats()})")
+        if job.result is None:
+            try:
+                self.server.scheduler.submit(job)
+            except queue.Full:
+                self._error(
+                    429, "Transcription queue is full, retry shortly", "rate_limit_error", {"Retry-After": "1"},
+                )
+                return
+            if not job.done.wait(REQUEST_TIMEOUT_S):
+                self._error(504, "Transcription timed out", "server_error")
+                return
+            if job.error is not None:
+                self._error(500, str(job.error), "server_error")
+                return
+            if key is not None:
+                cache.put(key, job.result)
+
+        text = job.result["text"].strip()
+        if response_format == "text":
+            self._reply(200, text, "text/plain; charset=utf-8")
+        elif response_format == "verbose_json":
+            self._reply(200, {
+                "task": "transcribe",
+                "language": job.result.get("language"),
+                "duration": len(audio) / WHISPER_SAMPLE_RATE,
+                "text": text,
+                "segments": job.result.get("segments", []),
+            })
+        else:
+            self._reply(200, {"text": text})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--max-batch", type=int, default=8, help="clips per batched forward pass")
+    parser.add_argument("--batch-wait-ms", type=float, default=20, help="how long to wait for a batch to fill")
+    parser.add_argument("--max-queue", type=int, default=32, help="queued requests before answering 429")
+    parser.add_argument("--cache", action="store_true", help="answer repeated audio from the transcription cache")
+    parser.add_argument("--cache-mb", type=float, default=256, help="size limit of the transcription cache")
+    args = parser.parse_args()
+
+    print(f"Loading model: {args.model}")
+    model, device = load_whisper_model(args.model)
+    print(f"[OK] Model loaded on {device.upper()}")
+
+    scheduler = BatchScheduler(model, device, args.max_batch, args.batch_wait_ms, args.max_queue)
+    scheduler.start()
+    server = ThreadingHTTPServer((args.host, args.port), TranscriptionHandler)
+    server.scheduler = scheduler
+    server.model_name = args.model
+    server.device = device
+    server.cache = TranscriptCache(max_mb=args.cache_mb) if args.cache else None
+    print(f"[OK] Listening on http://{args.host}:{args.port}/v1/audio/transcriptions")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,17 @@
 import os
+import queue
 import random
-import re
 import sys
 import threading
 import time
 import tkinter as tk
-import wave
 from collections import deque
+from contextlib import nullcontext
 
 import customtkinter as ctk
-import numpy as np
 
 import pyautogui
 import pyperclip
-import sounddevice as sd
-import torch
 from pynput import keyboard
 from pynput.keyboard import Key
 
@@ -35,7 +32,21 @@ except ImportError:
 except Exception as e:
     print(f"[WARNING] Error setting up bundled ffmpeg: {e}")
 
-import whisper  # Import after setting up ffmpeg
+from audio_utils import WHISPER_SAMPLE_RATE, RecordingBuffer
+from backends import DEFAULT_BACKEND, load_backend
+from latency_log import DEFAULT_LOG_PATH, LatencyLog, StageTimer
+from profiling import DEFAULT_PROFILE_DIR, DictationProfiler
+from recorder import AudioRecorder
+from telemetry import DEFAULT_TELEMETRY_DIR, ResourceSampler, model_bytes
+from transcribe_worker import connect_worker
+from transcript_cache import TranscriptCache
+from transcription import (
+    IncrementalTranscriber,
+    LiveDictation,
+    TranscriptionCancelled,
+    add_punctuation,
+)
+from vad import SilenceTracker, trim_silence
 
 
 class SimpleApp(ctk.CTk):
@@ -115,17 +126,98 @@ class SimpleApp(ctk.CTk):
 
         # Recording state
         self.is_recording = False
-        self.audio_frames = []
-        self.samplerate = 44100
+        self.samplerate = WHISPER_SAMPLE_RATE  # Frames are stored in model format
+        self.max_recording_seconds = float(os.environ.get("MAX_RECORDING_SECONDS", "600"))
+        self.audio_buffer = RecordingBuffer(self.max_recording_seconds, self.samplerate)
         self.channels = 1
-        self.temp_wav_file = "temp_audio.wav"
         self.audio_level = 0
         self.last_levels = deque(maxlen=5)
+        self.record_start_time = 0.0
+
+        # Callback capture (HOT_MIC=1 keeps the stream open with a short pre-roll)
+        self.recorder = AudioRecorder(
+            blocksize=int(os.environ.get("AUDIO_BLOCKSIZE", "1024")),
+            channels=self.channels,
+            hot=os.environ.get("HOT_MIC", "0") == "1",
+            preroll_ms=int(os.environ.get("PREROLL_MS", "300")),
+        )
+        if self.recorder.hot:
+            self.start_hot_mic()
+
+        # Voice activity detection (trims silence before transcription)
+        self.vad_enabled = os.environ.get("DISABLE_VAD", "0") != "1"
+
+        # Hands-free mode: stop automatically after trailing silence
+        self.auto_stop_ms = int(os.environ.get("AUTO_STOP_MS", "1000"))
+        self.silence_tracker = None
+        if os.environ.get("AUTO_STOP", "0") == "1":
+            self.silence_tracker = SilenceTracker(self.auto_stop_ms, self.samplerate)
+            self.recorder.on_block = self.check_auto_stop
+
+        # Incremental mode: transcribe finished segments while still recording
+        self.incremental_enabled = os.environ.get("INCREMENTAL", "0") == "1"
+        self.incremental = None
+
+        # Live mode: type words at the cursor as soon as they are confirmed
+        self.live_enabled = os.environ.get("LIVE_TYPING", "0") == "1"
+        self.live = None
 
         # Model settings
         self.model_name = "large-v3-turbo"
         self.model = None
         self.device_used = "CPU"
+        # Short-clip mode: encode short dictations at a truncated length instead of 30 s
+        self.short_clip_enabled = os.environ.get("SHORT_CLIP", "0") == "1"
+        # Batched mode: decode dictations over 30 s as one batch of pause-aligned segments
+        self.batched_enabled = os.environ.get("BATCHED_DECODE", "0") == "1"
+        # Worker mode: use the shared transcribe_worker.py process instead of an in-process model
+        self.use_worker = os.environ.get("TRANSCRIBE_WORKER", "0") == "1"
+        # Inference backend: openai-whisper or faster-whisper (see backends.py)
+        self.backend_name = os.environ.get("BACKEND", DEFAULT_BACKEND)
+        # Transcription cache: identical audio comes back from disk instead of re-running Whisper
+        self.cache = None
+        if os.environ.get("TRANSCRIPTION_CACHE", "0") == "1":
+            self.cache = TranscriptCache(max_mb=float(os.environ.get("TRANSCRIPTION_CACHE_MB", "256")))
+
+        # Job queue: finished recordings are transcribed one at a time, in order,
+        # so the next dictation can start while the previous one is still decoding
+        self.jobs = queue.Queue(maxsize=int(os.environ.get("JOB_QUEUE_SIZE", "4")))
+        self.inference_lock = threading.Lock()
+        self.current_job = None
+        threading.Thread(target=self.process_jobs, daemon=True).start()
+
+        # Latency log: one JSONL record of stage timings per dictation
+        self.latency_log = None
+        self.timer = None
+        if os.environ.get("LATENCY_LOG", "0") == "1":
+            self.latency_log = LatencyLog(
+                os.environ.get("LATENCY_LOG_PATH", DEFAULT_LOG_PATH),
+                max_mb=float(os.environ.get("LATENCY_LOG_MB", "10")),
+            )
+
+        # Profiling: cProfile + torch.profiler dumps for one dictation in PROFILE_EVERY
+        self.profiler = None
+        if os.environ.get("PROFILE_DICTATION", "0") == "1":
+            self.profiler = DictationProfiler(
+                os.environ.get("PROFILE_DIR", DEFAULT_PROFILE_DIR),
+                sample_every=int(os.environ.get("PROFILE_EVERY", "1")),
+                # The model runs in the worker process, so there is nothing to trace here
+                torch_trace=not self.use_worker,
+            )
+
+        # Telemetry: resource gauges in Prometheus textfile format (and the latency log)
+        self.model_bytes = 0
+        self.telemetry = None
+        if os.environ.get("TELEMETRY", "0") == "1":
+            self.telemetry = ResourceSampler(
+                os.environ.get("TELEMETRY_TEXTFILE")
+                or os.path.join(DEFAULT_TELEMETRY_DIR, f"{type(self).__name__}.prom"),
+                interval_s=float(os.environ.get("TELEMETRY_INTERVAL", "15")),
+                log=self.latency_log,
+                labels={"app": type(self).__name__},
+                gauges=self.telemetry_gauges,
+            )
+            self.telemetry.start()
 
         # Hotkey
         self.hotkey = Key.f8
@@ -166,13 +258,16 @@ class SimpleApp(ctk.CTk):
             script_content = f"""#!/usr/bin/env python3
 import socket
 import os
+import sys
+command = sys.argv[1] if len(sys.argv) > 1 else "toggle"
 try:
     sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
     sock.connect("/tmp/faststt_hotkey.sock")
-    sock.send(b"toggle")
+    sock.send(command.encode())
     sock.close()
 except Exception as e:
-    os.system("cd {os.getcwd()} && uv run python app.py &")
+    if command == "toggle":
+        os.system("cd {os.getcwd()} && uv run python app.py &")
 """
             with open(script_path, "w") as f:
                 f.write(script_content)
@@ -202,6 +297,8 @@ except Exception as e:
                         data = conn.recv(1024)
                         if data == b"toggle":
                             self.after_idle(self.toggle_recording)
+                        elif data == b"cancel":
+                            self.after_idle(self.cancel_processing)
                         conn.close()
                     except:
                         break
@@ -218,10 +315,12 @@ except Exception as e:
             def on_press(key):
                 if key == Key.f8:
                     self.after_idle(self.toggle_recording)
+                elif key == Key.f9:
+                    self.after_idle(self.cancel_processing)
 
             self.keyboard_listener = keyboard.Listener(on_press=on_press, suppress=False)
             self.keyboard_listener.start()
-            print("[OK] Global hotkey listener started (F8)")
+            print("[OK] Global hotkey listener started (F8, F9 to cancel)")
         except Exception as e:
             print(f"❌ Failed to start X11 keyboard listener: {e}")
             self.setup_fallback_hotkey()
@@ -232,38 +331,47 @@ except Exception as e:
             def on_press(key):
                 if key == Key.f8:
                     self.after_idle(self.toggle_recording)
+                elif key == Key.f9:
+                    self.after_idle(self.cancel_processing)
 
             self.keyboard_listener = keyboard.Listener(on_press=on_press, suppress=False)
             self.keyboard_listener.start()
-            print("[OK] App-focused hotkey active (F8)")
+            print("[OK] App-focused hotkey active (F8, F9 to cancel)")
         except Exception as e:
             print(f"❌ Hotkey setup failed: {e}")
 
     def load_model(self):
         """Load Whisper model"""
         try:
-            print(f"Loading model: {self.model_name}")
-            force_cpu = os.environ.get("FORCE_CPU", "0") == "1"
-
-            if force_cpu:
-                device = "cpu"
-            elif torch.cuda.is_available():
-                device = "cuda"
+            if self.use_worker:
+                self.model = connect_worker()
+                self.device_used = self.model.device
+                self.backend_name = self.model.backend
+                print(f"[OK] Using transcription worker ({self.model.model_name} on {self.device_used})")
             else:
-                device = "cpu"
-
-            self.model = whisper.load_model(self.model_name, device=device)
-            self.device_used = device.upper()
-            print(f"[OK] Model loaded on {self.device_used}")
-
-            if device == "cuda":
-                print(f"   GPU: {torch.cuda.get_device_name(0)}")
+                print(f"Loading model: {self.model_name} ({self.backend_name})")
+                self.model = load_backend(
+                    self.backend_name, self.model_name,
+                    short_clip=self.short_clip_enabled, batched=self.batched_enabled,
+                )
+                self.device_used = self.model.device.upper()
+                self.model_bytes = model_bytes(self.model.model)
+                print(f"[OK] Model loaded on {self.device_used}")
 
             self.after(0, lambda: self.status_label.configure(text="Ready ✓"))
         except Exception as e:
             print(f"❌ Error loading model: {e}")
             self.after(0, lambda: self.status_label.configure(text="Error!", text_color="#FF1744"))
 
+    def start_hot_mic(self):
+        """Open the always-on input stream used by hot mic mode"""
+        try:
+            self.recorder.open()
+            print(f"[OK] Hot mic open ({self.recorder.preroll_ms}ms pre-roll)")
+        except Exception as e:
+            print(f"[WARNING] Hot mic unavailable, opening stream per recording: {e}")
+            self.recorder.hot = False
+
     def toggle_recording(self):
         """Toggle recording state"""
         if self.model is None:
@@ -271,6 +379,11 @@ except Exception as e:
             return
         if self.is_recording:
             self.stop_recording()
+        elif self.jobs.full():
+            print(f"[QUEUE] {self.jobs.maxsize} recordings still waiting, not starting another")
+        elif self.live_enabled and self.jobs.unfinished_tasks:
+            # Live words are typed while speaking, which would land before the previous tail
+            print("[QUEUE] Previous dictation still typing, not starting another")
         else:
             self.start_recording()
 
@@ -283,10 +396,31 @@ except Exception as e:
             hover_color="#D50000",
         )
         self.status_label.configure(text="Recording...", text_color="#FF1744")
-        self.audio_frames = []
+        self.audio_buffer = RecordingBuffer(self.max_recording_seconds, self.samplerate)
         self.last_levels.clear()
+        if self.silence_tracker is not None:
+            self.silence_tracker.reset()
+        self.record_start_time = time.perf_counter()
+        self.timer = StageTimer(self.record_start_time)
         self.recording_thread = threading.Thread(target=self.record_audio)
         self.recording_thread.start()
+        self.incremental = None
+        self.live = None
+        self.cancel_event = cancel = threading.Event()
+        if self.live_enabled:
+            self.live = LiveDictation(
+                self.audio_buffer,
+                lambda audio, prompt: self.transcribe_segment(audio, prompt, cancel, word_timestamps=True),
+                self.type_words,
+            )
+            self.live.start()
+        elif self.incremental_enabled:
+            self.incremental = IncrementalTranscriber(
+                self.audio_buffer,
+                lambda audio, prompt: self.transcribe_segment(audio, prompt, cancel)["text"],
+                trim=self.vad_enabled,
+            )
+            self.incremental.start()
         self.audio_monitor_thread = threading.Thread(target=self.monitor_audio_level)
         self.audio_monitor_thread.start()
 
@@ -299,84 +433,287 @@ except Exception as e:
             hover_color="#3700B3",
         )
         self.status_label.configure(text="Processing...", text_color="#FF9800")
-        if hasattr(self, "recording_thread"):
-            self.recording_thread.join()
-        threading.Thread(target=self.process_audio, daemon=True).start()
+        self.timer.add("capture", self.timer.elapsed_ms())
+        with self.timer.stage("finalize"):
+            if hasattr(self, "recording_thread"):
+                self.recording_thread.join()
+            capture = self.recorder.end()
+            if self.incremental is not None:
+                self.incremental.stop()
+            if self.live is not None:
+                self.live.stop()
+        # Snapshot everything process_audio needs; the next recording replaces it
+        self.jobs.put_nowait({
+            "buffer": self.audio_buffer,
+            "capture": capture,
+            "incremental": self.incremental,
+            "live": self.live,
+            "cancel": self.cancel_event,
+            "timer": self.timer,
+            "outcome": "error",
+            "queued_at": time.perf_counter(),
+        })
+
+    def check_auto_stop(self, samples):
+        """Audio callback hook: stop once the speaker has gone quiet"""
+        if self.silence_tracker.triggered:
+            return
+        if self.silence_tracker.update(samples):
+            print(f"[REC] {self.auto_stop_ms}ms of silence, stopping automatically")
+            self.after_idle(self.auto_stop_recording)
+
+    def auto_stop_recording(self):
+        """Stop recording from auto-stop (ignored if already stopped by hand)"""
+        if self.is_recording:
+            self.stop_recording()
 
     def record_audio(self):
         """Record audio from microphone"""
         print("[REC] Starting audio recording...")
         try:
-            with sd.InputStream(
-                samplerate=self.samplerate, channels=self.channels, dtype="int16"
-            ) as stream:
-                while self.is_recording:
-                    audio_chunk, _ = stream.read(1024)
-                    self.audio_frames.append(audio_chunk)
-                    self.audio_level = np.abs(audio_chunk).mean()
+            # The PortAudio callback resamples into self.audio_buffer until end()
+            preroll = self.recorder.begin(self.audio_buffer)
+            if preroll:
+                print(f"[REC] Hot mic: capture began {preroll * 1000:.0f}ms before hotkey")
+                self.timer.add("stream_open", 0.0)
+            else:
+                open_ms = (time.perf_counter() - self.record_start_time) * 1000
+                print(f"[REC] Stream opened {open_ms:.0f}ms after hotkey")
+                self.timer.add("stream_open", open_ms)
         except Exception as e:
             print(f"Recording error: {e}")
 
     def monitor_audio_level(self):
         """Monitor audio level"""
         while self.is_recording:
+            self.audio_level = self.recorder.level
             time.sleep(0.05)
 
-    def process_audio(self):
+    def process_jobs(self):
+        """Inference worker: process queued recordings in the order they were made"""
+        while True:
+            job = self.jobs.get()
+            waited = time.perf_counter() - job["queued_at"]
+            if waited > 0.1:
+                print(f"[QUEUE] Waited {waited * 1000:.0f}ms behind earlier recordings")
+            job["timer"].add("queue_wait", waited * 1000)
+            self.current_job = job
+            try:
+                with self.profiler.profile() if self.profiler is not None else nullcontext() as profiled:
+                    job["profiled"] = bool(profiled)
+                    self.process_audio(job)
+            finally:
+                self.current_job = None
+                self.log_latency(job)
+                if self.telemetry is not None:
+                    self.telemetry.observe(job["timer"])
+                self.jobs.task_done()
+
+    def cancel_processing(self):
+        """Discard the recording in progress, or abort the one being transcribed"""
+        if self.is_recording:
+            print("[CANCEL] Recording discarded")
+            self.cancel_event.set()
+            if self.use_worker:
+                self.model.cancel()  # a live-typing decode may be in flight
+            self.stop_recording()
+            return
+        job = self.current_job
+        if job is None:
+            return
+        print("[CANCEL] Cancelling transcription...")
+        job["cancel"].set()
+        if self.use_worker:
+            self.model.cancel()
+
+    def process_audio(self, job):
         """Process recorded audio"""
-        if not self.audio_frames:
+        if not job["buffer"]:
+            job["outcome"] = "no_audio"
+            self.show_ready()
             return
+        incremental = job["incremental"]
+        live = job["live"]
+        cancel = job["cancel"]
+        timer = job["timer"]
 
         try:
-            audio_data = np.concatenate(self.audio_frames, axis=0)
-            with wave.open(self.temp_wav_file, "wb") as wf:
-                wf.setnchannels(self.channels)
-                wf.setsampwidth(2)
-                wf.setframerate(self.samplerate)
-                wf.writeframes(audio_data.tobytes())
+            if cancel.is_set():
+                raise TranscriptionCancelled()
+            if live is not None:
+                # Confirmed words were typed while recording; only the tail is left
+                with timer.stage("transcribe"), self.timed_model(timer):
+                    text = live.finish()
+                print(f"[LIVE] Dictated: '{text}'")
+                job["outcome"] = "live"
+                self.show_ready()
+                return
+
+            # Zero-copy view of the 16 kHz float32 recording, minus silence
+            with timer.stage("vad"):
+                audio, vad_info = self.apply_vad(job["buffer"].view())
+            if not audio.size:
+                print("[VAD] No speech detected, skipping transcription")
+                job["outcome"] = "no_speech"
+                self.show_ready()
+                return
 
             print("[TRANSCRIBE] Starting transcription...")
-            result = self.model.transcribe(
-                self.temp_wav_file, fp16=(self.device_used == "CUDA")
-            )
+            transcribe_start = time.perf_counter()
+            with timer.stage("transcribe"), self.timed_model(timer):
+                if incremental is not None:
+                    # Earlier segments were decoded while recording, only the tail is left
+                    result = {"text": incremental.finish(), "segments_decoded": incremental.segments}
+                    vad_info = None
+                else:
+                    result = self.transcribe_segment(audio, cancel=cancel)
+                    job["speech_seconds"] = audio.size / self.samplerate
+            result["capture"] = job["capture"]
+            self.log_capture_stats(job["capture"])
+            if vad_info:
+                # Inference time scales roughly with audio length
+                rtf = (time.perf_counter() - transcribe_start) / max(vad_info["output_seconds"], 0.1)
+                vad_info["est_saved_seconds"] = rtf * vad_info["removed_seconds"]
+                result["vad"] = vad_info
+                print(f"[VAD] ~{vad_info['est_saved_seconds'] * 1000:.0f}ms inference saved (est.)")
             transcription = result["text"].strip()
             print(f"[TEXT] Raw: '{transcription}'")
 
             if transcription:
-                final_text = self.add_punctuation(transcription)
+                with timer.stage("punctuation"):
+                    final_text = add_punctuation(transcription)
                 print(f"[TEXT] Final: {final_text}")
-                self.insert_text(final_text)
+                if cancel.is_set():
+                    raise TranscriptionCancelled()
+                with timer.stage("insert"):
+                    self.insert_text(final_text)
+                job["outcome"] = "inserted"
             else:
-                self.record_button.configure(text="🎙", fg_color="#6200EE")
-                self.status_label.configure(text="Ready", text_color="#888888")
+                job["outcome"] = "empty"
+                self.show_ready()
 
+        except TranscriptionCancelled:
+            print("[CANCEL] Transcription cancelled, nothing typed")
+            job["outcome"] = "cancelled"
+            self.show_ready()
         except Exception as e:
             print(f"Processing error: {e}")
-            self.record_button.configure(text="❌", fg_color="#6200EE")
-            self.status_label.configure(text="Error!", text_color="#FF1744")
-        finally:
-            if os.path.exists(self.temp_wav_file):
-                os.remove(self.temp_wav_file)
-
-    def add_punctuation(self, text):
-        """Add intelligent punctuation to text"""
-        if not text:
-            return text
-
-        text = text.strip()
-        if not text.endswith((".", "!", "?", ";", ":")):
-            question_words = ["what", "how", "why", "when", "where", "who", "which", "whose", "whom"]
-            if any(text.lower().startswith(word) for word in question_words):
-                text += "?"
-            else:
-                text += "."
-        text += " "
-        if text:
-            text = text[0].upper() + text[1:]
-        text = re.sub(r"\s+(and|but|or|so|yet|for|nor)\s+", r", \1 ", text)
-        text = re.sub(r"\s+([.!?])", r"\1", text)
-        text = re.sub(r"([.!?])([A-Za-z])", r"\1 \2", text)
-        return text
+            if not self.is_recording:
+                self.record_button.configure(text="❌", fg_color="#6200EE")
+                self.status_label.configure(text="Error!", text_color="#FF1744")
+
+    def timed_model(self, timer):
+        """Encoder/decoder timings for the latency log (in-process model only)"""
+        if self.latency_log is None or self.use_worker:
+            return nullcontext()
+        return self.model.timed_stages(timer)
+
+    def log_latency(self, job):
+        """Append the finished job's stage timings to the latency log"""
+        if self.latency_log is None:
+            return
+        timer = job["timer"]
+        stages = dict(timer.stages)
+        if "encoder" in stages:
+            # The rest of the Whisper call: padding, tokenizer and the decoding loop around the model
+            stages["whisper_other"] = (
+                stages["transcribe"] - stages["encoder"] - stages.get("decoder", 0.0) - stages.get("mel", 0.0)
+            )
+        audio_seconds = len(job["buffer"]) / self.samplerate
+        speech_seconds = job.get("speech_seconds")
+        total_ms = timer.elapsed_ms()
+        self.latency_log.write({
+            "type": "dictation",
+            "time": time.time(),
+            "app": type(self).__name__,
+            "outcome": job["outcome"],
+            "model": self.model_name,
+            "backend": self.backend_name,
+            "device": self.device_used,
+            "audio_seconds": audio_seconds,
+            "speech_seconds": speech_seconds,
+            # Whole-clip decodes only; incremental/live spread decoding over the recording
+            "rtf": stages.get("transcribe", 0.0) / 1000 / speech_seconds if speech_seconds else None,
+            "total_ms": total_ms,
+            "latency_ms": total_ms - stages.get("capture", 0.0),
+            "stages": stages,
+            "stage_cpu": timer.cpu,
+            "modes": {
+                "vad": self.vad_enabled, "incremental": job["incremental"] is not None,
+                "live": job["live"] is not None, "short_clip": self.short_clip_enabled,
+                "batched": self.batched_enabled, "worker": self.use_worker,
+                "cache": self.cache is not None, "profiled": job.get("profiled", False),
+            },
+        })
+
+    def telemetry_gauges(self):
+        """App-level values for the resource sampler"""
+        return {
+            "pending_jobs": self.jobs.qsize() + (self.current_job is not None),
+            "model_bytes": self.model_bytes,
+        }
+
+    def transcribe_segment(self, audio, prompt=None, cancel=None, **options):
+        """Run Whisper on 16 kHz float32 audio, optionally primed with earlier text"""
+        key = None
+        # Live typing re-decodes a growing window every second, so it is never cached
+        if self.cache is not None and not options:
+            start = time.perf_counter()
+            # The decoder the backend (or, in worker mode, the worker) will really run
+            key = self.cache.transcript_key(
+                audio, self.model_name, self.device_used, self.backend_name,
+                path=self.model.decode_path(audio), prompt=prompt,
+            )
+            result = self.cache.get(key)
+            if result is not None:
+                print(f"[CACHE] Hit in {(time.perf_counter() - start) * 1000:.0f}ms ({self.cache.stats()})")
+                return result
+            print(f"[CACHE] Miss ({self.cache.stats()})")
+        # Incremental and live decoding of the next recording share the model with the job queue
+        with self.inference_lock:
+            result = self.run_whisper(audio, prompt, cancel, **options)
+        if key is not None:
+            self.cache.put(key, result)
+        return result
+
+    def run_whisper(self, audio, prompt=None, cancel=None, **options):
+        """Transcribe with the loaded backend or the transcription worker"""
+        if self.use_worker:
+            # The worker applies fp16, SHORT_CLIP and BATCHED_DECODE itself
+            return self.model.transcribe(audio, initial_prompt=prompt, cancel=cancel, **options)
+        return self.model.transcribe(audio, prompt, cancel, **options)
+
+    def apply_vad(self, audio):
+        """Trim leading/trailing silence and long pauses; returns (audio, info)"""
+        if not self.vad_enabled:
+            return audio, None
+        start = time.perf_counter()
+        trimmed, info = trim_silence(audio, self.samplerate)
+        print(
+            f"[VAD] Removed {info['removed_seconds']:.1f}s of {info['input_seconds']:.1f}s "
+            f"({info['segments']} speech segments, {(time.perf_counter() - start) * 1000:.0f}ms)"
+        )
+        return trimmed, info
+
+    def log_capture_stats(self, stats):
+        """Log overflow/underrun counts for the last recording"""
+        if not stats:
+            return
+        print(
+            f"[REC] {stats['blocks']} blocks of {stats['blocksize']}, "
+            f"{stats['input_overflows']} overflows, {stats['input_underflows']} underflows"
+        )
+        if stats["input_overflows"] or stats["input_underflows"]:
+            print("[WARNING] Audio was dropped during capture (CPU busy?)")
+        if stats["dropped_samples"]:
+            print(f"[WARNING] Recording capped at {self.max_recording_seconds:.0f}s")
+
+    def type_words(self, text):
+        """Type confirmed live-dictation words at the cursor"""
+        try:
+            pyautogui.typewrite(text, interval=0.001)
+        except Exception as e:
+            print(f"Insert error: {e}")
 
     def insert_text(self, text):
         """Insert text at cursor"""
@@ -384,18 +721,28 @@ except Exception as e:
             pyperclip.copy(text)
             pyautogui.typewrite(text, interval=0.001)
             print(f"[OK] Inserted: {text}")
-            self.after(500, lambda: [
-                self.record_button.configure(text="🎙", fg_color="#6200EE"),
-                self.status_label.configure(text="Ready", text_color="#888888"),
-            ])
+            self.after(500, self.show_ready)
         except Exception as e:
             print(f"Insert error: {e}")
-            self.record_button.configure(text="🎙", fg_color="#6200EE")
-            self.status_label.configure(text="Ready", text_color="#888888")
+            self.show_ready()
+
+    def show_ready(self):
+        """Return to idle once the queue is drained, unless a new recording started"""
+        if self.is_recording:
+            return
+        if self.jobs.qsize():
+            self.status_label.configure(text=f"Processing ({self.jobs.qsize()} queued)...", text_color="#FF9800")
+            return
+        self.record_button.configure(text="🎙", fg_color="#6200EE")
+        self.status_label.configure(text="Ready", text_color="#888888")
 
     def cleanup(self):
         """Clean up resources"""
         self.is_recording = False
+        try:
+            self.recorder.close()
+        except:
+            pass
         if hasattr(self, "_socket_server_running"):
             self._socket_server_running = False
             try:
@@ -407,8 +754,6 @@ except Exception as e:
                 self.keyboard_listener.stop()
             except:
                 pass
-        if os.path.exists(self.temp_wav_file):
-            os.remove(self.temp_wav_file)
 
     def on_closing(self):
         """Handle window closing"""
@@ -0,0 +1,296 @@
+"""Audio helpers shared by the FastSimple apps"""
+import re
+import subprocess
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Whisper models expect mono float32 audio at 16 kHz
+WHISPER_SAMPLE_RATE = 16000
+
+# Windowed-sinc anti-aliasing filter settings for the polyphase resampler
+RESAMPLE_ZERO_CROSSINGS = 10
+RESAMPLE_KAISER_BETA = 8.0
+
+
+@lru_cache(maxsize=8)
+def design_resample_filter(up, down, zero_crossings=RESAMPLE_ZERO_CROSSINGS):
+    """Design polyphase low-pass filter, returned as a (up, taps) matrix"""
+    cutoff = 0.5 / max(up, down)
+    half_len = zero_crossings * max(up, down)
+    taps = int(np.ceil((2 * half_len + 1) / up))
+    length = taps * up
+    n = np.arange(length) - (length - 1) / 2.0
+    h = 2.0 * cutoff * np.sinc(2.0 * cutoff * n)
+    h *= np.kaiser(length, RESAMPLE_KAISER_BETA)
+    h *= up / h.sum()  # unity DC gain after zero-stuffing
+    # phases[p, j] = h[p + j * up]
+    phases = h.reshape(taps, up).T.astype(np.float32)
+    return phases, (length - 1) // 2
+
+
+def _polyphase(padded, phases, up, down, delay, first, count, shift=0):
+    """Compute `count` outputs starting at output index `first`
+
+    `padded[i]` holds input sample `i - taps + shift`. Outputs sharing the
+    same residue modulo `up` use the same filter phase and read input
+    windows spaced `down` apart, so each residue is one strided matmul.
+    """
+    taps = phases.shape[1]
+    # windows[i, j] = padded[i + taps - 1 - j]
+    windows = sliding_window_view(padded, taps)[:, ::-1]
+    if count < 2 * up:
+        # Short chunks: one gathered dot product per output is cheaper
+        pos = (first + np.arange(count)) * down + delay
+        return np.einsum("ij,ij->i", windows[pos // up + 1 - shift], phases[pos % up])
+    out = np.empty(count, dtype=np.float32)
+    for r in range(up):
+        pos = (first + r) * down + delay
+        n = len(range(r, count, up))
+        rows = windows[pos // up + 1 - shift::down][:n]
+        out[r::up] = rows @ phases[pos % up]
+    return out
+
+
+def resample_poly(audio, orig_sr, target_sr=WHISPER_SAMPLE_RATE):
+    """Resample a 1-D float32 signal with a vectorized polyphase filter"""
+    audio = np.asarray(audio, dtype=np.float32)
+    if orig_sr == target_sr or audio.size == 0:
+        return audio
+
+    g = gcd(int(orig_sr), int(target_sr))
+    up, down = int(target_sr) // g, int(orig_sr) // g
+    phases, delay = design_resample_filter(up, down)
+    taps = phases.shape[1]
+
+    n_out = -(-audio.size * up // down)
+    # Zero padding on both sides so every tap window stays in range
+    padded = np.concatenate([
+        np.zeros(taps, dtype=np.float32),
+        audio,
+        np.zeros(taps + delay // up + 1, dtype=np.float32),
+    ])
+    return _polyphase(padded, phases, up, down, delay, 0, n_out)
+
+
+class StreamingResampler:
+    """Polyphase resampler fed chunk by chunk while recording
+
+    Produces the same output as resample_poly on the concatenated input,
+    so the recording is already in model format when capture stops and
+    only flush() (a few dozen samples) remains on the post-stop path.
+    """
+
+    def __init__(self, orig_sr, target_sr=WHISPER_SAMPLE_RATE):
+        self.orig_sr = int(orig_sr)
+        self.target_sr = int(target_sr)
+        g = gcd(self.orig_sr, self.target_sr)
+        self.up, self.down = self.target_sr // g, self.orig_sr // g
+        self.passthrough = self.up == self.down
+        self._in_total = 0
+        self._out_count = 0
+        if not self.passthrough:
+            self.phases, self.delay = design_resample_filter(self.up, self.down)
+            self.taps = self.phases.shape[1]
+            # _buffer[i] holds input sample i - taps + _shift
+            self._buffer = np.zeros(self.taps, dtype=np.float32)
+            self._shift = 0
+
+    def process(self, chunk):
+        """Feed input samples, return the output samples that are now complete"""
+        chunk = np.asarray(chunk, dtype=np.float32).reshape(-1)
+        if self.passthrough:
+            return chunk
+        self._buffer = np.concatenate([self._buffer, chunk])
+        self._in_total += chunk.size
+        # An output is complete once its newest tap has arrived
+        end = (self._in_total * self.up - 1 - self.delay) // self.down + 1
+        return self._emit(end)
+
+    def flush(self):
+        """Zero-pad the tail and return the remaining output samples"""
+        if self.passthrough:
+            return np.zeros(0, dtype=np.float32)
+        padding = np.zeros(self.taps + self.delay // self.up + 1, dtype=np.float32)
+        self._buffer = np.concatenate([self._buffer, padding])
+        return self._emit(-(-self._in_total * self.up // self.down))
+
+    def _emit(self, end):
+        count = end - self._out_count
+        if count <= 0:
+            return np.zeros(0, dtype=np.float32)
+        out = _polyphase(
+            self._buffer, self.phases, self.up, self.down, self.delay,
+            self._out_count, count, self._shift,
+        )
+        self._out_count = end
+        # Drop input older than the first tap of the next output
+        drop = (end * self.down + self.delay) // self.up + 1 - self._shift
+        self._buffer = self._buffer[drop:]
+        self._shift += drop
+        return out
+
+
+class RecordingBuffer:
+    """Contiguous float32 recording buffer with geometric growth
+
+    Replaces a list of small chunks: appends copy into one preallocated
+    array (capacity doubles when full, up to max_seconds) and view()
+    returns the recorded audio without concatenating or copying.
+    """
+
+    def __init__(self, max_seconds=600, samplerate=WHISPER_SAMPLE_RATE, initial_seconds=30):
+        self.samplerate = samplerate
+        self.max_samples = int(max_seconds * samplerate)
+        capacity = min(int(initial_seconds * samplerate), self.max_samples)
+        self._data = np.empty(max(capacity, 1), dtype=np.float32)
+        self._size = 0
+        self.dropped = 0  # samples discarded after reaching max_seconds
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def duration(self):
+        """Recorded length in seconds"""
+        return self._size / self.samplerate
+
+    @property
+    def full(self):
+        return self._size >= self.max_samples
+
+    def append(self, samples):
+        """Copy samples in; returns False once the maximum duration is reached"""
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        room = self.max_samples - self._size
+        if samples.size > room:
+            self.dropped += samples.size - room
+            samples = samples[:room]
+        end = self._size + samples.size
+        if end > self._data.size:
+            capacity = self._data.size
+            while capacity < end:
+                capacity *= 2
+            grown = np.empty(min(capacity, self.max_samples), dtype=np.float32)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:end] = samples
+        self._size = end
+        return not self.full
+
+    def view(self):
+        """Zero-copy view of the recorded samples"""
+        return self._data[:self._size]
+
+
+class PreRollBuffer:
+    """Fixed-size ring buffer holding the most recent samples"""
+
+    def __init__(self, capacity):
+        self._data = np.zeros(max(int(capacity), 1), dtype=np.float32)
+        self._pos = 0
+        self._filled = 0
+
+    def __len__(self):
+        return self._filled
+
+    def append(self, samples):
+        """Write samples, overwriting the oldest ones"""
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        size = self._data.size
+        if samples.size >= size:
+            self._data[:] = samples[-size:]
+            self._pos = 0
+            self._filled = size
+            return
+        end = self._pos + samples.size
+        if end <= size:
+            self._data[self._pos:end] = samples
+        else:
+            split = size - self._pos
+            self._data[self._pos:] = samples[:split]
+            self._data[:end - size] = samples[split:]
+        self._pos = end % size
+        self._filled = min(self._filled + samples.size, size)
+
+    def snapshot(self):
+        """Return the buffered samples oldest-first (a copy)"""
+        if self._filled < self._data.size:
+            return self._data[:self._filled].copy()
+        return np.concatenate([self._data[self._pos:], self._data[:self._pos]])
+
+    def clear(self):
+        self._pos = 0
+        self._filled = 0
+
+
+def to_whisper_audio(audio, samplerate):
+    """Convert recorded PCM to the mono float32 16 kHz array Whisper expects"""
+    audio = np.asarray(audio)
+    if audio.dtype == np.int16:
+        audio = audio.astype(np.float32) / 32768.0
+    else:
+        audio = audio.astype(np.float32, copy=False)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1) if audio.shape[1] > 1 else audio[:, 0]
+    return resample_poly(audio, samplerate, WHISPER_SAMPLE_RATE)
+
+
+def ffmpeg_exe():
+    """The imageio-ffmpeg bundled binary when installed, else ffmpeg from PATH"""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return "ffmpeg"
+
+
+def load_audio_file(path, start=0.0, duration=None, samplerate=WHISPER_SAMPLE_RATE):
+    """Decode an audio/video file (or a part of it) to mono float32 with ffmpeg"""
+    cmd = [ffmpeg_exe(), "-nostdin", "-v", "error"]
+    if start:
+        cmd += ["-ss", f"{start:.3f}"]
+    cmd += ["-i", str(path)]
+    if duration is not None:
+        cmd += ["-t", f"{duration:.3f}"]
+    cmd += ["-f", "s16le", "-ac", "1", "-ar", str(samplerate), "-"]
+    proc = subprocess.run(cmd, capture_output=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed on {path}: {proc.stderr.decode(errors='replace').strip()}")
+    return np.frombuffer(proc.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def iter_audio_file(path, block_seconds=1.0, samplerate=WHISPER_SAMPLE_RATE):
+    """Yield a media file as mono float32 blocks, decoding it as it is read"""
+    cmd = [
+        ffmpeg_exe(), "-nostdin", "-v", "error", "-i", str(path),
+        "-f", "s16le", "-ac", "1", "-ar", str(samplerate), "-",
+    ]
+    block_bytes = int(block_seconds * samplerate) * 2
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            data = proc.stdout.read(block_bytes)
+            if not data:
+                break
+            yield np.frombuffer(data[:len(data) - len(data) % 2], dtype=np.int16).astype(np.float32) / 32768.0
+        if proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed on {path}: {proc.stderr.read().decode(errors='replace').strip()}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+
+
+def audio_duration(path):
+    """Duration of a media file in seconds, read from ffmpeg's header probe"""
+    proc = subprocess.run([ffmpeg_exe(), "-nostdin", "-i", str(path)], capture_output=True)
+    match = re.search(rb"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", proc.stderr)
+    if match is None:
+        raise RuntimeError(f"Could not read the duration of {path}")
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
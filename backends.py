@@ -0,0 +1,139 @@
+"""Inference backends the apps and the transcription worker can run on
+
+A backend loads a model by name and turns 16 kHz float32 audio into the
+result shape process_audio consumes: {"text", "segments", "language"},
+with openai-whisper style segment dicts (start/end/text and, with
+word_timestamps=True, "words"). BACKEND picks one at startup:
+
+    whisper         openai-whisper on PyTorch (default)
+    faster-whisper  CTranslate2 via the faster-whisper package, int8 on CPU
+"""
+import os
+from contextlib import nullcontext
+
+from transcription import (
+    TranscriptionCancelled,
+    cancellable,
+    decode_path,
+    load_whisper_model,
+    timed_stages,
+    transcribe_audio,
+)
+
+DEFAULT_BACKEND = "whisper"
+
+
+class WhisperBackend:
+    """openai-whisper, with the SHORT_CLIP / BATCHED_DECODE decoding paths"""
+
+    name = "whisper"
+
+    def __init__(self, model_name, short_clip=False, batched=False):
+        self.model_name = model_name
+        self.short_clip = short_clip
+        self.batched = batched
+        self.model = None
+        self.device = None
+
+    def load(self):
+        self.model, self.device = load_whisper_model(self.model_name)
+        return self
+
+    def transcribe(self, audio, prompt=None, cancel=None, **options):
+        with cancellable(self.model, cancel):
+            return transcribe_audio(
+                self.model, audio, prompt, fp16=(self.device == "cuda"),
+                short_clip=self.short_clip, batched=self.batched, **options,
+            )
+
+    def segments(self, audio, prompt=None, cancel=None, **options):
+        # Always model.transcribe: the SHORT_CLIP and BATCHED_DECODE paths keep no
+        # timestamps. It returns once the whole clip is decoded
+        with cancellable(self.model, cancel):
+            result = self.model.transcribe(audio, fp16=(self.device == "cuda"), initial_prompt=prompt, **options)
+        yield from result["segments"]
+
+    def decode_path(self, audio, **options):
+        return decode_path(audio, self.short_clip, self.batched, **options)
+
+    def timed_stages(self, timer):
+        return timed_stages(self.model, timer)
+
+
+class FasterWhisperBackend:
+    """faster-whisper (CTranslate2); segments are decoded lazily, one 30 s window at a time
+
+    FASTER_WHISPER_COMPUTE overrides the compute type (default int8 on
+    CPU, float16 on CUDA). SHORT_CLIP and BATCHED_DECODE do not apply.
+    """
+
+    name = "faster-whisper"
+
+    def __init__(self, model_name, **_):
+        self.model_name = model_name
+        self.model = None
+        self.device = None
+
+    def load(self):
+        try:
+            import ctranslate2
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise RuntimeError("BACKEND=faster-whisper needs the faster-whisper package (uv pip install faster-whisper)")
+        force_cpu = os.environ.get("FORCE_CPU", "0") == "1"
+        device = "cuda" if not force_cpu and ctranslate2.get_cuda_device_count() > 0 else "cpu"
+        compute_type = os.environ.get("FASTER_WHISPER_COMPUTE") or ("float16" if device == "cuda" else "int8")
+        self.model = WhisperModel(self.model_name, device=device, compute_type=compute_type)
+        self.device = f"{device}-{compute_type}"
+        return self
+
+    def transcribe(self, audio, prompt=None, cancel=None, **options):
+        segments, info = self._decode(audio, prompt, cancel, **options)
+        segments = list(segments)
+        return {"text": "".join(s["text"] for s in segments), "segments": segments, "language": info.language}
+
+    def segments(self, audio, prompt=None, cancel=None, **options):
+        segments, _ = self._decode(audio, prompt, cancel, **options)
+        yield from segments
+
+    def decode_path(self, audio, **options):
+        return "full"
+
+    def timed_stages(self, timer):
+        return nullcontext()  # encoder and decoder run inside CTranslate2
+
+    def _decode(self, audio, prompt, cancel, **options):
+        # transcribe() runs language detection now and decodes as the generator is consumed
+        segments, info = self.model.transcribe(audio, initial_prompt=prompt, **options)
+        return self._segment_dicts(segments, cancel), info
+
+    @staticmethod
+    def _segment_dicts(segments, cancel):
+        try:
+            for segment in segments:
+                if cancel is not None and cancel.is_set():
+                    raise TranscriptionCancelled()
+                result = {
+                    "id": segment.id, "seek": segment.seek, "start": segment.start, "end": segment.end,
+                    "text": segment.text, "tokens": segment.tokens, "temperature": segment.temperature,
+                    "avg_logprob": segment.avg_logprob, "compression_ratio": segment.compression_ratio,
+                    "no_speech_prob": segment.no_speech_prob,
+                }
+                if segment.words is not None:
+                    result["words"] = [
+                        {"word": w.word, "start": w.start, "end": w.end, "probability": w.probability}
+                        for w in segment.words
+                    ]
+                yield result
+        finally:
+            segments.close()
+
+
+BACKENDS = {backend.name: backend for backend in (WhisperBackend, FasterWhisperBackend)}
+
+
+def load_backend(name, model_name, **flags):
+    """Construct and load the named backend; flags are backend-specific (short_clip, batched)"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown BACKEND '{name}' (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name](model_name, **flags).load()
@@ -0,0 +1,364 @@
+"""Transcribe folders of recordings from the command line
+
+Files are spread over a pool of worker processes. On Linux/macOS the
+model is loaded once in the parent and the workers are forked from it,
+so its weights are shared copy-on-write instead of loaded per worker.
+Every finished file is appended to a JSONL manifest; running the same
+command again skips files that are already done.
+
+With --stream, files are decoded and transcribed one 30 s window at a
+time, so memory use does not grow with recording length.
+
+With --shards, long files are also cut at pauses into overlapping shards
+that are transcribed in parallel and stitched back together, so a single
+multi-hour recording keeps every worker busy.
+
+--backend picks the inference engine as BACKEND does for the apps.
+
+Usage:
+    uv run python batch_transcribe.py recordings/ --workers 4
+    uv run python batch_transcribe.py long_meeting.mp3 --workers 8 --shards 8
+    uv run python batch_transcribe.py all_day_recording.flac --stream
+    uv run python batch_transcribe.py "meetings/**/*.m4a" --output-dir transcripts
+    uv run python batch_transcribe.py recordings/ --backend faster-whisper
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+from audio_utils import WHISPER_SAMPLE_RATE, audio_duration, load_audio_file
+from backends import BACKENDS, DEFAULT_BACKEND, load_backend
+from transcript_cache import TranscriptCache
+from transcription import stitch_shards, stream_transcribe
+from vad import find_pause_near
+
+MODEL_NAME = "large-v3-turbo"
+AUDIO_EXTENSIONS = (
+    ".wav", ".mp3", ".m4a", ".flac", ".ogg", ".opus", ".webm", ".aac", ".wma", ".mp4", ".mkv",
+)
+MANIFEST_NAME = "manifest.jsonl"
+
+# Files are only sharded into pieces at least this long
+MIN_SHARD_SECONDS = 120
+# Audio shared by neighbouring shards so a word at a cut is heard whole
+SHARD_OVERLAP_SECONDS = 2.0
+# How far from the even split point to look for a pause to cut at
+CUT_SEARCH_SECONDS = 15.0
+
+# Set in the parent before forking, or by _init_worker under spawn
+_model = None
+_model_name = None
+_device = None
+_cache = None
+
+
+def find_audio_files(inputs):
+    """Expand directories (recursively) and glob patterns into audio files"""
+    files = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            for root, _, names in os.walk(pattern):
+                files += [os.path.join(root, name) for name in names]
+        else:
+            files += glob.glob(pattern, recursive=True)
+    seen = set()
+    result = []
+    for path in sorted(files):
+        path = os.path.abspath(path)
+        if path.lower().endswith(AUDIO_EXTENSIONS) and path not in seen:
+            seen.add(path)
+            result.append(path)
+    return result
+
+
+def output_path(path, output_dir=None):
+    """Transcript path: next to the recording, or in output_dir"""
+    stem = os.path.splitext(os.path.basename(path))[0] + ".txt"
+    return os.path.join(output_dir or os.path.dirname(path), stem)
+
+
+def load_manifest(path):
+    """Map of recording path -> last manifest entry"""
+    entries = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line from an interrupted run
+                entries[entry["path"]] = entry
+    return entries
+
+
+def is_done(entry, path):
+    """True when the manifest says path was transcribed and nothing changed since"""
+    if entry is None or entry.get("status") != "done" or not os.path.exists(entry["output"]):
+        return False
+    stat = os.stat(path)
+    return entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime
+
+
+def _init_worker(backend_name, model_name, threads, cache_mb):
+    global _model, _model_name, _device, _cache
+    import torch
+    torch.set_num_threads(threads)
+    if _model is None:
+        _model = load_backend(backend_name, model_name)
+        _model_name = model_name
+        _device = _model.device
+        if cache_mb:
+            _cache = TranscriptCache(max_mb=cache_mb)
+
+
+def plan_cuts(path, duration, shards):
+    """Cut points (seconds) splitting a file into shards at the nearest pauses"""
+    cuts = []
+    for k in range(1, shards):
+        target = duration * k / shards
+        start = max(0.0, target - CUT_SEARCH_SECONDS)
+        # Only a window around each split point is decoded, not the whole file
+        window = load_audio_file(path, start, 2 * CUT_SEARCH_SECONDS)
+        pause = find_pause_near(window, int((target - start) * WHISPER_SAMPLE_RATE))
+        cuts.append(target if pause is None else start + pause / WHISPER_SAMPLE_RATE)
+    return cuts
+
+
+def transcribe_task(task):
+    """Worker entry point: transcribe a whole file or one shard of it"""
+    path, index, start, duration, stream, options = task
+    begin = time.perf_counter()
+    try:
+        if stream:
+            # Bounded memory: only one window of audio is decoded at a time
+            text = " ".join(
+                segment["text"] for segment in stream_transcribe(_model, path, **options)
+            )
+            return {
+                "path": path,
+                "index": index,
+                "text": text,
+                "words": [],
+                "audio_seconds": audio_duration(path),
+                "elapsed": time.perf_counter() - begin,
+            }
+        audio = load_audio_file(path, start, duration)
+        result = key = None
+        if _cache is not None:
+            key = _cache.transcript_key(audio, _model_name, _device, _model.name, path="full", **options)
+            result = _cache.get(key)
+        cached = result is not None
+        if not cached:
+            result = _model.transcribe(audio, **options)
+            if key is not None:
+                _cache.put(key, result)
+    except Exception as e:
+        return {"path": path, "index": index, "error": str(e)}
+    words = [
+        (start + word["start"], start + word["end"], word["word"])
+        for segment in result["segments"]
+        for word in segment.get("words", [])
+    ]
+    return {
+        "path": path,
+        "index": index,
+        "text": result["text"],
+        "words": words,
+        "audio_seconds": len(audio) / WHISPER_SAMPLE_RATE,
+        "elapsed": time.perf_counter() - begin,
+        "cached": cached,
+    }
+
+
+def finish_file(path, job):
+    """Write the transcript of a file whose tasks are all done; returns its manifest entry"""
+    stat = os.stat(path)
+    entry = {"path": path, "output": job["output"], "size": stat.st_size, "mtime": stat.st_mtime}
+    results = job["results"]
+    errors = [r["error"] for r in results if "error" in r]
+    if errors:
+        entry.update(status="error", error=errors[0])
+        return entry
+    if len(results) == 1:
+        text = results[0]["text"].strip()
+        audio_seconds = results[0]["audio_seconds"]
+    else:
+        text = stitch_shards([r["words"] for r in results], job["cuts"])
+        audio_seconds = job["duration"]
+    try:
+        os.makedirs(os.path.dirname(job["output"]), exist_ok=True)
+        with open(job["output"] + ".tmp", "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        os.replace(job["output"] + ".tmp", job["output"])
+    except OSError as e:
+        entry.update(status="error", error=str(e))
+        return entry
+    # Worker time summed over shards, so overlap shows up as a slightly higher RTF
+    elapsed = sum(r["elapsed"] for r in results)
+    entry.update(
+        status="done",
+        shards=len(results),
+        cached=all(r.get("cached") for r in results),
+        audio_seconds=round(audio_seconds, 3),
+        elapsed_seconds=round(elapsed, 3),
+        rtf=round(elapsed / audio_seconds, 4) if audio_seconds else None,
+    )
+    return entry
+
+
+def print_summary(entries, wall_seconds, skipped, cache_stats=None):
+    done = [e for e in entries if e["status"] == "done"]
+    failed = len(entries) - len(done)
+    audio = sum(e["audio_seconds"] for e in done)
+    print(f"\nFiles: {len(done)} done, {failed} failed, {skipped} skipped (already in manifest)")
+    if cache_stats is not None:
+        print(f"Cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+    if not done or not audio:
+        return
+    rtfs = np.array([e["rtf"] for e in done if e["rtf"] is not None])
+    print(f"Audio: {audio / 60:.1f} min in {wall_seconds / 60:.1f} min wall time")
+    print(f"Aggregate RTF: {wall_seconds / audio:.3f} ({audio / wall_seconds:.1f}x real time)")
+    print(
+        f"Per-file RTF: median {np.median(rtfs):.3f}, p95 {np.percentile(rtfs, 95):.3f}, "
+        f"worst {rtfs.max():.3f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe audio files with Whisper")
+    parser.add_argument("inputs", nargs="+", help="directories and/or glob patterns")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 4))
+    parser.add_argument("--output-dir", help="write transcripts here instead of next to each file")
+    parser.add_argument("--manifest", help=f"manifest path (default: {MANIFEST_NAME} in the output dir or cwd)")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--backend", choices=list(BACKENDS), default=DEFAULT_BACKEND, help="inference engine")
+    parser.add_argument("--language", help="skip language detection, e.g. en")
+    parser.add_argument(
+        "--shards", type=int, default=1,
+        help=f"split files into up to N shards (of at least {MIN_SHARD_SECONDS}s) transcribed in parallel",
+    )
+    parser.add_argument(
+        "--cache", action="store_true",
+        help="reuse results for audio transcribed before (also by the apps or api_server.py with the same settings)",
+    )
+    parser.add_argument("--cache-mb", type=float, default=1024, help="size limit of the transcription cache")
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="read files window by window so memory stays flat for multi-hour recordings",
+    )
+    args = parser.parse_args()
+
+    files = find_audio_files(args.inputs)
+    if not files:
+        print("No audio files found")
+        return 1
+    manifest_path = args.manifest or os.path.join(args.output_dir or os.getcwd(), MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    pending = [path for path in files if not is_done(manifest.get(path), path)]
+    skipped = len(files) - len(pending)
+    print(f"{len(files)} file(s), {skipped} already done, {len(pending)} to transcribe")
+    if not pending:
+        return 0
+
+    global _model, _model_name, _device, _cache
+    print(f"Loading model: {args.model} ({args.backend})")
+    try:
+        _model = load_backend(args.backend, args.model)
+    except RuntimeError as e:
+        print(f"[ERROR] {e}")
+        return 1
+    _model_name = args.model
+    _device = device = _model.device
+    cache_mb = args.cache_mb if args.cache else None
+    if cache_mb:
+        _cache = TranscriptCache(max_mb=cache_mb)
+    print(f"[OK] Model loaded on {device.upper()}")
+
+    workers = args.workers
+    if device.startswith("cuda") or args.backend != "whisper":
+        # CUDA contexts do not survive fork, and one GPU is the bottleneck anyway;
+        # CTranslate2 runs its own thread pool, which does not survive fork either
+        workers = 1
+    # Without fork (Windows) each worker has to load its own copy of the model
+    fork = "fork" in multiprocessing.get_all_start_methods()
+    options = {"language": args.language} if args.language else {}
+
+    jobs = {}
+    tasks = []
+    for path in pending:
+        job = {"output": output_path(path, args.output_dir), "cuts": [], "duration": None}
+        shards = 1
+        if args.shards > 1:
+            try:
+                job["duration"] = audio_duration(path)
+                shards = min(args.shards, int(job["duration"] // MIN_SHARD_SECONDS))
+                if shards > 1:
+                    job["cuts"] = plan_cuts(path, job["duration"], shards)
+                    print(f"Splitting {os.path.basename(path)} into {shards} shards")
+            except RuntimeError as e:
+                print(f"[WARNING] Not sharding {path}: {e}")
+                shards = 1
+        if shards > 1:
+            bounds = [0.0] + job["cuts"] + [job["duration"]]
+            for i in range(shards):
+                start = max(0.0, bounds[i] - SHARD_OVERLAP_SECONDS)
+                end = bounds[i + 1] + SHARD_OVERLAP_SECONDS
+                tasks.append((path, i, start, end - start, False, dict(options, word_timestamps=True)))
+        else:
+            tasks.append((path, 0, 0.0, None, args.stream, options))
+        job["results"] = [None] * shards
+        job["remaining"] = shards
+        jobs[path] = job
+    workers = min(workers, len(tasks))
+
+    os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+    entries = []
+    cache_stats = {"hits": 0, "misses": 0} if args.cache else None
+    start = time.perf_counter()
+    with open(manifest_path, "a", encoding="utf-8") as log:
+        def record(entry):
+            entries.append(entry)
+            log.write(json.dumps(entry) + "\n")
+            log.flush()
+            os.fsync(log.fileno())
+            if entry["status"] == "done":
+                source = "cached" if entry["cached"] else f"RTF {entry['rtf']}"
+                print(f"[OK] {entry['path']} ({entry['audio_seconds']:.0f}s audio, {source})")
+            else:
+                print(f"[WARNING] {entry['path']}: {entry['error']}")
+
+        def collect(result):
+            if cache_stats is not None and "cached" in result:
+                cache_stats["hits" if result["cached"] else "misses"] += 1
+            job = jobs[result["path"]]
+            job["results"][result["index"]] = result
+            job["remaining"] -= 1
+            if not job["remaining"]:
+                record(finish_file(result["path"], job))
+
+        try:
+            if workers == 1:
+                for task in tasks:
+                    collect(transcribe_task(task))
+            else:
+                threads = max(1, (os.cpu_count() or 1) // workers)
+                context = multiprocessing.get_context("fork" if fork else "spawn")
+                print(f"Starting {workers} workers ({threads} threads each)")
+                with context.Pool(workers, _init_worker, (args.backend, args.model, threads, cache_mb)) as pool:
+                    for result in pool.imap_unordered(transcribe_task, tasks):
+                        collect(result)
+        except KeyboardInterrupt:
+            print("\nInterrupted, finished files are kept in the manifest")
+
+    print_summary(entries, time.perf_counter() - start, skipped, cache_stats)
+    return 0 if all(e["status"] == "done" for e in entries) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Benchmark: temp WAV + ffmpeg hand-off vs in-memory float32 hand-off
+
+Usage:
+    uv run python benchmarks/bench_audio_handoff.py
+    uv run python benchmarks/bench_audio_handoff.py --durations 5 30 --transcribe tiny
+
+Both routes end with the same 16 kHz float32 array, so the model cost is
+identical; the difference is what each dictation pays before inference.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import wave
+
+from common import synthetic_speech, time_call
+
+import whisper
+
+from audio_utils import to_whisper_audio
+
+SAMPLERATE = 44100
+
+
+def wav_route(frames, path):
+    """Old process_audio path: write temp WAV, let Whisper decode it with ffmpeg"""
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLERATE)
+        wf.writeframes(frames.tobytes())
+    audio = whisper.load_audio(path)
+    os.remove(path)
+    return audio
+
+
+def memory_route(frames):
+    """New process_audio path: convert in memory"""
+    return to_whisper_audio(frames, SAMPLERATE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--durations", type=float, nargs="+", default=[3, 10, 30, 60])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--transcribe", metavar="MODEL", help="also time full transcribe() with this model")
+    args = parser.parse_args()
+
+    if shutil.which("ffmpeg") is None:
+        print("[WARNING] ffmpeg not on PATH; the WAV route cannot be measured")
+        return
+
+    model = whisper.load_model(args.transcribe, device="cpu") if args.transcribe else None
+    wav_path = os.path.join(tempfile.mkdtemp(prefix="faststt_bench_"), "temp_audio.wav")
+
+    print(f"{'clip':>6} | {'wav+ffmpeg':>11} | {'in-memory':>10} | {'saved':>9}")
+    for duration in args.durations:
+        frames = synthetic_speech(duration, SAMPLERATE)
+        wav_ms, _, wav_audio = time_call(lambda: wav_route(frames, wav_path), args.repeats)
+        mem_ms, _, mem_audio = time_call(lambda: memory_route(frames), args.repeats)
+        print(f"{duration:5.0f}s | {wav_ms:9.1f}ms | {mem_ms:8.1f}ms | {wav_ms - mem_ms:7.1f}ms")
+
+        if model is not None:
+            for name, audio in (("wav", wav_audio), ("memory", mem_audio)):
+                total_ms, _, result = time_call(lambda: model.transcribe(audio, fp16=False), 1, 0)
+                print(f"         transcribe({name}): {total_ms:.0f}ms '{result['text'].strip()[:40]}'")
+
+    shutil.rmtree(os.path.dirname(wav_path), ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
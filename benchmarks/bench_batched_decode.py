@@ -0,0 +1,75 @@
+"""Benchmark: batched vs sequential decoding of long dictations
+
+Usage:
+    uv run python benchmarks/bench_batched_decode.py --model base --threads 8
+    uv run python benchmarks/bench_batched_decode.py --model large-v3-turbo --audio talk.wav --minutes 1 3
+
+For each length the same audio is transcribed three ways:
+  transcribe  - model.transcribe (Whisper's sequential 30 s sliding window)
+  sequential  - the pause-aligned segments from split_at_pauses, one at a time
+  batched     - the same segments through transcribe_long_batched
+--audio uses a real recording (looped to length) instead of synthetic speech.
+"redone" counts segments the quality guard sent back to model.transcribe.
+"""
+import argparse
+
+from common import synthetic_speech, time_call
+
+import numpy as np
+import torch
+import whisper
+
+from audio_utils import WHISPER_SAMPLE_RATE, load_audio_file, to_whisper_audio
+from transcription import DECODE_BATCH_SIZE, split_at_pauses, transcribe_batch, transcribe_long_batched
+
+
+def test_audio(minutes, source=None):
+    n = int(minutes * 60 * WHISPER_SAMPLE_RATE)
+    if source is None:
+        return to_whisper_audio(synthetic_speech(minutes * 60, WHISPER_SAMPLE_RATE), WHISPER_SAMPLE_RATE)
+    return np.resize(source, n)
+
+
+def sequential(model, audio):
+    texts = []
+    for start, end in split_at_pauses(audio):
+        clip = audio[start:end]
+        result = transcribe_batch(model, [clip])[0] or model.transcribe(clip, fp16=False)
+        texts.append(result["text"].strip())
+    return " ".join(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--threads", type=int, default=torch.get_num_threads())
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 3, 10])
+    parser.add_argument("--batch-size", type=int, default=DECODE_BATCH_SIZE)
+    parser.add_argument("--audio", help="recording to use instead of synthetic speech")
+    parser.add_argument("--repeats", type=int, default=1)
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    model = whisper.load_model(args.model, device="cpu")
+    source = load_audio_file(args.audio) if args.audio else None
+    print(f"Model {args.model}, {args.threads} threads, batch size {args.batch_size}")
+    print(
+        f"{'input':>6} | {'segments':>8} | {'transcribe':>10} | {'sequential':>10} | {'batched':>9} | "
+        f"speedup | redone"
+    )
+    for minutes in args.minutes:
+        audio = test_audio(minutes, source)
+        segments = len(split_at_pauses(audio))
+        base_ms, _, _ = time_call(lambda: model.transcribe(audio, fp16=False), args.repeats, warmup=0)
+        seq_ms, _, _ = time_call(lambda: sequential(model, audio), args.repeats, warmup=0)
+        batch_ms, _, result = time_call(
+            lambda: transcribe_long_batched(model, audio, batch_size=args.batch_size), args.repeats, warmup=0,
+        )
+        print(
+            f"{minutes:4g}min | {segments:8d} | {base_ms / 1000:9.1f}s | {seq_ms / 1000:9.1f}s | "
+            f"{batch_ms / 1000:8.1f}s | {seq_ms / batch_ms:6.2f}x | {result['redone_segments']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
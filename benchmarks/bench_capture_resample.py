@@ -0,0 +1,94 @@
+"""Benchmark: 44.1 kHz int16 capture vs streaming 16 kHz float32 capture
+
+Usage:
+    uv run python benchmarks/bench_capture_resample.py --device-rate 48000
+
+Replays a synthetic recording through both record_audio variants in
+1024-frame reads (no microphone needed) and reports stored bytes per
+minute of audio, per-read CPU cost and the post-stop latency up to the
+array handed to model.transcribe.
+"""
+import argparse
+import sys
+import time
+
+from common import synthetic_speech
+
+import numpy as np
+
+from audio_utils import RecordingBuffer, StreamingResampler, to_whisper_audio
+
+BLOCK = 1024
+
+
+def frames_bytes(frames):
+    """Payload plus per-chunk ndarray object overhead"""
+    return sum(f.nbytes + sys.getsizeof(f) - f.nbytes for f in frames) + sys.getsizeof(frames)
+
+
+def old_capture(capture, device_rate):
+    """int16 chunks at the capture rate, resampled after stop"""
+    frames = []
+    for i in range(0, capture.shape[0], BLOCK):
+        frames.append(capture[i:i + BLOCK].copy())
+    start = time.perf_counter()
+    audio = to_whisper_audio(np.concatenate(frames, axis=0), device_rate)
+    return frames, 0.0, time.perf_counter() - start, audio
+
+
+def new_capture(capture, device_rate):
+    """float32 chunks resampled to 16 kHz while recording"""
+    resampler = StreamingResampler(device_rate)
+    frames = []
+    per_read = 0.0
+    floats = capture.astype(np.float32) / 32768.0
+    for i in range(0, floats.shape[0], BLOCK):
+        t0 = time.perf_counter()
+        frames.append(resampler.process(floats[i:i + BLOCK, 0]))
+        per_read += time.perf_counter() - t0
+    start = time.perf_counter()
+    frames.append(resampler.flush())
+    audio = np.concatenate(frames, axis=0)
+    return frames, per_read / len(frames), time.perf_counter() - start, audio
+
+
+def buffer_capture(capture, device_rate):
+    """Streaming resample into one preallocated RecordingBuffer"""
+    resampler = StreamingResampler(device_rate)
+    buffer = RecordingBuffer(max_seconds=capture.shape[0] / device_rate + 1)
+    per_read = 0.0
+    reads = 0
+    floats = capture.astype(np.float32) / 32768.0
+    for i in range(0, floats.shape[0], BLOCK):
+        t0 = time.perf_counter()
+        buffer.append(resampler.process(floats[i:i + BLOCK, 0]))
+        per_read += time.perf_counter() - t0
+        reads += 1
+    start = time.perf_counter()
+    buffer.append(resampler.flush())
+    audio = buffer.view()
+    return [buffer._data], per_read / reads, time.perf_counter() - start, audio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--device-rate", type=int, default=44100)
+    parser.add_argument("--durations", type=float, nargs="+", default=[10, 60, 300])
+    args = parser.parse_args()
+
+    read_ms = BLOCK / args.device_rate * 1000
+    print(f"Device rate {args.device_rate} Hz, {BLOCK}-frame reads ({read_ms:.1f}ms each)")
+    print(f"{'clip':>6} | {'variant':>8} | {'MB/min':>7} | {'cpu/read':>9} | {'post-stop':>9}")
+    for duration in args.durations:
+        capture = synthetic_speech(duration, args.device_rate)
+        for name, fn in (("before", old_capture), ("chunks", new_capture), ("buffer", buffer_capture)):
+            frames, per_read, post_stop, audio = fn(capture, args.device_rate)
+            mb_per_min = frames_bytes(frames) / 1e6 / (duration / 60)
+            print(
+                f"{duration:5.0f}s | {name:>8} | {mb_per_min:7.2f} | "
+                f"{per_read * 1000:7.3f}ms | {post_stop * 1000:7.2f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
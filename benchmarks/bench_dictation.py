@@ -0,0 +1,177 @@
+"""Benchmark: end-to-end dictation latency, real-time factor and peak RSS
+
+Usage:
+    uv run python benchmarks/bench_dictation.py --models tiny base --threads 1 4 --output results.json
+    uv run python benchmarks/bench_dictation.py --fixtures clips/ --modes default short_clip beam5
+    uv run python benchmarks/bench_dictation.py --baseline results.json --max-regression 0.15
+
+Runs each clip through the same code process_audio uses (VAD trim,
+transcribe_audio, add_punctuation), with no microphone, window or Ollama.
+Fixtures are the WAV files in --fixtures, or synthetic speech of each
+--lengths. Every model/thread combination runs in a fresh process, so
+its peak RSS is its own. For every clip and decode mode it reports
+p50/p95 latency and the real-time factor (p50 latency / clip length).
+--output writes all results to JSON. With --baseline, the run fails when
+a configuration's p50 or p95 is more than --max-regression slower than
+in the baseline file.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from common import load_fixtures, peak_rss_mb, time_call
+
+import numpy as np
+
+from audio_utils import WHISPER_SAMPLE_RATE
+from transcription import add_punctuation, transcribe_audio
+from vad import trim_silence
+
+# Decode options swept with --modes (the apps' SHORT_CLIP / BATCHED_DECODE, beam search)
+MODES = {
+    "default": {},
+    "short_clip": {"short_clip": True},
+    "batched": {"batched": True},
+    "beam5": {"beam_size": 5},
+}
+
+
+def dictate(model, audio, vad=True, fp16=False, **mode):
+    """process_audio without the window: trim silence, transcribe, punctuate"""
+    if vad:
+        audio, _ = trim_silence(audio, WHISPER_SAMPLE_RATE)
+        if not audio.size:
+            return ""
+    result = transcribe_audio(model, audio, fp16=fp16, **mode)
+    return add_punctuation(result["text"].strip())
+
+
+def run_child(config):
+    import torch
+    import whisper
+
+    torch.set_num_threads(config["threads"])
+    model = whisper.load_model(config["model"], device=config["device"])
+    model_rss = peak_rss_mb()
+    fp16 = config["device"] == "cuda"
+    results = []
+    for name, seconds, audio in load_fixtures(config["fixtures"], config["lengths"]):
+        for mode in config["modes"]:
+            _, samples, text = time_call(
+                lambda: dictate(model, audio, vad=config["vad"], fp16=fp16, **MODES[mode]),
+                config["repeats"], warmup=config["warmup"],
+            )
+            p50, p95 = np.percentile(samples, [50, 95])
+            results.append({
+                "model": config["model"], "threads": config["threads"], "device": config["device"],
+                "fixture": name, "seconds": seconds, "mode": mode,
+                "p50_ms": p50, "p95_ms": p95, "rtf": p50 / 1000 / seconds,
+                "samples_ms": samples, "text": text[:80],
+            })
+    print(json.dumps({"results": results, "peak_rss_mb": peak_rss_mb(), "model_rss_mb": model_rss}))
+
+
+def measure(config):
+    proc = subprocess.run(
+        [sys.executable, __file__, "--child", json.dumps(config)], capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip())
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def result_key(result):
+    return (result["model"], result["threads"], result["device"], result["fixture"], result["mode"])
+
+
+def check_regressions(results, baseline_path, max_regression):
+    """Messages for every configuration slower than its baseline by more than max_regression"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {result_key(r): r for r in json.load(f)["results"]}
+    failures = []
+    compared = 0
+    for result in results:
+        base = baseline.get(result_key(result))
+        if base is None:
+            continue
+        compared += 1
+        for metric in ("p50_ms", "p95_ms"):
+            change = result[metric] / base[metric] - 1
+            if change > max_regression:
+                failures.append(
+                    f"{'/'.join(map(str, result_key(result)))} {metric} {base[metric]:.0f} -> "
+                    f"{result[metric]:.0f}ms ({change:+.0%}, limit {max_regression:+.0%})"
+                )
+    print(f"\nCompared {compared} configurations against {baseline_path}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", nargs="+", default=["base"])
+    parser.add_argument("--threads", type=int, nargs="+", default=[os.cpu_count() or 1])
+    parser.add_argument("--lengths", type=float, nargs="+", default=[5, 15, 60], help="synthetic clip seconds")
+    parser.add_argument("--fixtures", help="directory of .wav clips to use instead of synthetic speech")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=["default", "short_clip", "batched"])
+    parser.add_argument("--no-vad", action="store_true", help="skip silence trimming (DISABLE_VAD=1)")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10, help="allowed slowdown, 0.10 = 10%%")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(json.loads(args.child))
+        return 0
+
+    import torch
+    import whisper
+
+    results = []
+    print(f"{'model':>14} | {'thr':>3} | {'fixture':>16} | {'mode':>10} | {'p50':>8} | {'p95':>8} | {'RTF':>6} | peak RSS")
+    for model in args.models:
+        for threads in args.threads:
+            run = measure({
+                "model": model, "threads": threads, "device": args.device, "vad": not args.no_vad,
+                "fixtures": args.fixtures, "lengths": args.lengths, "modes": args.modes,
+                "repeats": args.repeats, "warmup": args.warmup,
+            })
+            for result in run["results"]:
+                result["peak_rss_mb"] = run["peak_rss_mb"]
+                result["model_rss_mb"] = run["model_rss_mb"]
+                results.append(result)
+                print(
+                    f"{os.path.basename(model):>14} | {threads:3d} | {result['fixture'][:16]:>16} | {result['mode']:>10} | "
+                    f"{result['p50_ms']:6.0f}ms | {result['p95_ms']:6.0f}ms | {result['rtf']:6.3f} | "
+                    f"{run['peak_rss_mb']:.0f} MB"
+                )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "time": time.time(), "platform": platform.platform(), "python": platform.python_version(),
+                    "torch": torch.__version__, "whisper": whisper.__version__, "cpus": os.cpu_count(),
+                    "vad": not args.no_vad, "repeats": args.repeats,
+                },
+                "results": results,
+            }, f, indent=2)
+        print(f"\nWrote {len(results)} results to {args.output}")
+
+    failures = check_regressions(results, args.baseline, args.max_regression) if args.baseline else []
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if args.baseline and not failures:
+        print("PASS")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""Benchmark: CPU encoder time against clip length with truncated encoder input
+
+Usage:
+    uv run python benchmarks/bench_encoder.py --model large-v3-turbo --threads 8
+    uv run python benchmarks/bench_encoder.py --model base --decode
+
+Times model.encoder on the 30 s padded input Whisper normally uses and
+on each SHORT_CLIP_BUCKETS length. With --decode it also runs
+transcribe_short against model.transcribe on the same clip, to show the
+end-to-end saving and whether the quality guard accepts the result.
+"""
+import argparse
+
+from common import synthetic_speech, time_call
+
+import torch
+import whisper
+from whisper.audio import FRAMES_PER_SECOND, N_FRAMES
+
+from audio_utils import to_whisper_audio
+from transcription import SHORT_CLIP_BUCKETS, transcribe_short, truncated_encoder
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--threads", type=int, default=torch.get_num_threads())
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--decode", action="store_true")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    model = whisper.load_model(args.model, device="cpu")
+    print(f"Model {args.model}, {args.threads} threads")
+
+    full = torch.zeros(1, model.dims.n_mels, N_FRAMES)
+    with torch.no_grad():
+        full_ms, _, _ = time_call(lambda: model.encoder(full), args.repeats)
+    print(f"{'input':>6} | {'encoder':>9} | {'vs 30s':>6}")
+    for bucket in SHORT_CLIP_BUCKETS:
+        n_frames = bucket * FRAMES_PER_SECOND
+        mel = torch.zeros(1, model.dims.n_mels, n_frames)
+        with torch.no_grad(), truncated_encoder(model, n_frames):
+            ms, _, _ = time_call(lambda: model.encoder(mel), args.repeats)
+        print(f"{bucket:5d}s | {ms:7.0f}ms | {ms / full_ms:5.0%}")
+    print(f"{30:5d}s | {full_ms:7.0f}ms | {1:5.0%}")
+
+    if args.decode:
+        print(f"\n{'clip':>5} | {'transcribe':>10} | {'short':>8} | bucket")
+        for seconds in (2, 4, 8, 15):
+            audio = to_whisper_audio(synthetic_speech(seconds), 44100)
+            base_ms, _, _ = time_call(lambda: model.transcribe(audio, fp16=False), args.repeats)
+            short_ms, _, result = time_call(lambda: transcribe_short(model, audio), args.repeats)
+            bucket = result["short_clip_bucket"] if result else "rejected"
+            print(f"{seconds:4d}s | {base_ms:8.0f}ms | {short_ms:6.0f}ms | {bucket}")
+
+
+if __name__ == "__main__":
+    main()
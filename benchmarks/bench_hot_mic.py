@@ -0,0 +1,116 @@
+"""Benchmark: hot mic idle CPU overhead and hotkey-to-first-sample latency
+
+Usage:
+    uv run python benchmarks/bench_hot_mic.py              # needs a microphone
+    uv run python benchmarks/bench_hot_mic.py --synthetic  # callback cost only
+
+Cold latency is measured the way record_audio works: open a fresh
+InputStream and time until the first captured sample. Hot latency is the
+time from begin() to the first sample it delivers into the recording,
+which is negative because the pre-roll is captured before the hotkey.
+"""
+import argparse
+import statistics
+import time
+
+from common import synthetic_speech
+
+import numpy as np
+import sounddevice as sd
+
+from audio_utils import PreRollBuffer, RecordingBuffer
+from recorder import AudioRecorder, input_samplerate
+
+
+def cold_latency(device_rate, blocksize):
+    """Seconds from 'hotkey' to the first sample of a freshly opened stream"""
+    first = {}
+
+    def callback(indata, frames, time_info, status):
+        if "t" not in first:
+            # The block's first sample was captured frames/rate before delivery
+            first["t"] = time.perf_counter() - frames / device_rate
+
+    start = time.perf_counter()
+    with sd.InputStream(samplerate=device_rate, channels=1, dtype="float32",
+                        blocksize=blocksize, callback=callback):
+        while "t" not in first:
+            time.sleep(0.001)
+    return first["t"] - start
+
+
+def hot_latency(mic):
+    """Seconds from begin() to the oldest sample placed in the recording"""
+    buffer = RecordingBuffer(max_seconds=5)
+    preroll = mic.begin(buffer)
+    time.sleep(0.2)
+    mic.end()
+    return -preroll
+
+
+def idle_cpu(seconds, mic=None):
+    """Process CPU time per wall-clock second while idle"""
+    if mic is not None:
+        mic.open()
+    time.sleep(0.5)
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    time.sleep(seconds)
+    return (time.process_time() - cpu0) / (time.perf_counter() - wall0)
+
+
+def synthetic(args):
+    """Drive the idle callback directly to measure its cost without a device"""
+    mic = AudioRecorder(blocksize=args.blocksize, hot=True, preroll_ms=args.preroll_ms)
+    # Set up what open() would, minus the PortAudio stream
+    mic.device_rate = args.device_rate
+    mic._preroll = PreRollBuffer(mic.device_rate * mic.preroll_ms / 1000)
+    audio = synthetic_speech(10, args.device_rate).astype(np.float32) / 32768.0
+    status = sd.CallbackFlags()
+    blocks = [audio[i:i + args.blocksize] for i in range(0, audio.shape[0] - args.blocksize, args.blocksize)]
+
+    for name, target in (("idle", None), ("recording", RecordingBuffer(max_seconds=20))):
+        if target is not None:
+            mic.begin(target)
+        start = time.perf_counter()
+        for block in blocks:
+            mic._callback(block, args.blocksize, None, status)
+        per_block = (time.perf_counter() - start) / len(blocks)
+        period = args.blocksize / args.device_rate
+        print(f"{name:>9} callback: {per_block * 1e6:6.1f}us per block = {per_block / period * 100:.3f}% of one core")
+    start = time.perf_counter()
+    mic.end()
+    mic.begin(RecordingBuffer(max_seconds=5))
+    print(f"  begin() with {args.preroll_ms}ms pre-roll: {(time.perf_counter() - start) * 1000:.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--preroll-ms", type=int, default=300)
+    parser.add_argument("--blocksize", type=int, default=1024)
+    parser.add_argument("--trials", type=int, default=10)
+    parser.add_argument("--idle-seconds", type=float, default=10)
+    parser.add_argument("--synthetic", action="store_true")
+    parser.add_argument("--device-rate", type=int, default=48000, help="rate for --synthetic")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        synthetic(args)
+        return
+
+    device_rate = input_samplerate()
+    print(f"Input device rate {device_rate} Hz, blocksize {args.blocksize}")
+
+    base = idle_cpu(args.idle_seconds)
+    mic = AudioRecorder(blocksize=args.blocksize, hot=True, preroll_ms=args.preroll_ms)
+    hot = idle_cpu(args.idle_seconds, mic)
+    print(f"Idle CPU: baseline {base * 100:.2f}%, hot mic {hot * 100:.2f}% (+{(hot - base) * 100:.2f}%)")
+
+    cold = [cold_latency(device_rate, args.blocksize) for _ in range(args.trials)]
+    warm = [hot_latency(mic) for _ in range(args.trials)]
+    mic.close()
+    print(f"Hotkey -> first sample, cold stream: median {statistics.median(cold) * 1000:.0f}ms, max {max(cold) * 1000:.0f}ms")
+    print(f"Hotkey -> first sample, hot mic:     median {statistics.median(warm) * 1000:.0f}ms (pre-roll)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark: post-stop latency of full-clip vs incremental transcription
+
+Usage:
+    uv run python benchmarks/bench_incremental.py --model base --lengths 15 60
+
+Feeds a synthetic dictation into a RecordingBuffer in real time (or
+--speed times faster) while IncrementalTranscriber works in the
+background, then measures the time from "stop" to final text. The
+full-clip baseline transcribes the whole recording after stop, as
+process_audio does without INCREMENTAL=1.
+"""
+import argparse
+import time
+
+from common import synthetic_speech
+
+import numpy as np
+import whisper
+
+from audio_utils import WHISPER_SAMPLE_RATE, RecordingBuffer, to_whisper_audio
+from transcription import IncrementalTranscriber
+
+
+def dictation(seconds, seed=0):
+    """Speech in ~6 s sentences separated by 0.8 s pauses"""
+    rng = np.random.default_rng(seed)
+    pieces = []
+    while sum(len(p) for p in pieces) < seconds * WHISPER_SAMPLE_RATE:
+        pieces.append(to_whisper_audio(synthetic_speech(6, 44100, seed), 44100))
+        pieces.append((0.002 * rng.standard_normal(int(0.8 * WHISPER_SAMPLE_RATE))).astype(np.float32))
+    return np.concatenate(pieces)[:int(seconds * WHISPER_SAMPLE_RATE)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--lengths", type=float, nargs="+", default=[15, 30, 60])
+    parser.add_argument("--speed", type=float, default=1.0, help="feed audio this many times faster than real time")
+    args = parser.parse_args()
+
+    model = whisper.load_model(args.model, device="cpu")
+
+    def transcribe(audio, prompt=None):
+        return model.transcribe(audio, fp16=False, initial_prompt=prompt)["text"]
+
+    block = 1024
+    print(f"{'length':>7} | {'full post-stop':>14} | {'incremental post-stop':>21} | segments")
+    for seconds in args.lengths:
+        clip = dictation(seconds)
+
+        start = time.perf_counter()
+        transcribe(clip)
+        full = time.perf_counter() - start
+
+        buffer = RecordingBuffer(max_seconds=seconds + 1)
+        incremental = IncrementalTranscriber(buffer, transcribe)
+        incremental.start()
+        for i in range(0, len(clip), block):
+            buffer.append(clip[i:i + block])
+            time.sleep(block / WHISPER_SAMPLE_RATE / args.speed)
+        start = time.perf_counter()
+        incremental.finish()
+        post_stop = time.perf_counter() - start
+
+        print(f"{seconds:6.0f}s | {full:12.2f}s | {post_stop:19.2f}s | {incremental.segments}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Benchmark: int8-quantized vs fp32 CPU inference (latency, memory, WER)
+
+Usage:
+    uv run python benchmarks/bench_int8.py --model base --threads 4
+    uv run python benchmarks/bench_int8.py --model small --fixtures clips/ --output int8.json
+
+Each precision loads the model through load_whisper_model (FORCE_CPU=1,
+INT8_CPU=0/1) in a fresh process, so its peak RSS is its own, and runs
+every clip through the dictation path (VAD trim, transcribe_audio,
+add_punctuation). "vs fp32" is the word error rate of the int8 text
+against the fp32 text of the same clip. When a fixture clip.wav has a
+clip.txt next to it, "WER" is against that reference transcript.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from common import load_fixtures, peak_rss_mb, time_call, word_error_rate
+
+import numpy as np
+
+from bench_dictation import dictate
+
+PRECISIONS = {"fp32": "0", "int8": "1"}
+
+
+def run_child(config):
+    import torch
+
+    from telemetry import model_bytes, process_stats
+    from transcription import load_whisper_model
+
+    torch.set_num_threads(config["threads"])
+    model, device = load_whisper_model(config["model"])
+    # Current, not peak: loading briefly holds the fp32 weights either way
+    model_rss = process_stats().get("rss_bytes", 0) / 1024 / 1024
+    results = []
+    for name, seconds, audio in load_fixtures(config["fixtures"], config["lengths"]):
+        _, samples, text = time_call(
+            lambda: dictate(model, audio, vad=config["vad"]), config["repeats"], warmup=config["warmup"],
+        )
+        p50, p95 = np.percentile(samples, [50, 95])
+        results.append({
+            "fixture": name, "seconds": seconds, "p50_ms": p50, "p95_ms": p95,
+            "rtf": p50 / 1000 / seconds, "samples_ms": samples, "text": text,
+        })
+    print(json.dumps({
+        "device": device, "model_mb": model_bytes(model) / 1024 / 1024, "model_rss_mb": model_rss,
+        "peak_rss_mb": peak_rss_mb(), "results": results,
+    }))
+
+
+def measure(config, int8):
+    env = dict(os.environ, FORCE_CPU="1", INT8_CPU=int8)
+    proc = subprocess.run(
+        [sys.executable, __file__, "--child", json.dumps(config)], capture_output=True, text=True, env=env,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip())
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def reference_text(fixtures_dir, name):
+    if not fixtures_dir:
+        return None
+    path = os.path.join(fixtures_dir, os.path.splitext(name)[0] + ".txt")
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--lengths", type=float, nargs="+", default=[5, 15, 60], help="synthetic clip seconds")
+    parser.add_argument("--fixtures", help="directory of .wav clips (and optional .txt transcripts)")
+    parser.add_argument("--no-vad", action="store_true", help="skip silence trimming (DISABLE_VAD=1)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(json.loads(args.child))
+        return
+
+    config = {
+        "model": args.model, "threads": args.threads, "vad": not args.no_vad, "fixtures": args.fixtures,
+        "lengths": args.lengths, "repeats": args.repeats, "warmup": args.warmup,
+    }
+    runs = {precision: measure(config, int8) for precision, int8 in PRECISIONS.items()}
+
+    print(f"Model {args.model}, {args.threads} threads")
+    print(f"{'':>6} | {'weights':>8} | {'RSS after load':>14} | {'peak RSS':>8}")
+    for precision, run in runs.items():
+        print(
+            f"{precision:>6} | {run['model_mb']:6.0f}MB | {run['model_rss_mb']:12.0f}MB | {run['peak_rss_mb']:6.0f}MB"
+        )
+    print(
+        f"\n{'fixture':>16} | {'fp32 p50':>8} | {'int8 p50':>8} | {'int8 p95':>8} | {'speedup':>7} | "
+        f"{'vs fp32':>7} | {'fp32 WER':>8} | int8 WER"
+    )
+    for fp32, int8 in zip(runs["fp32"]["results"], runs["int8"]["results"]):
+        int8["wer_vs_fp32"] = word_error_rate(fp32["text"], int8["text"])
+        reference = reference_text(args.fixtures, fp32["fixture"])
+        if reference is not None:
+            fp32["wer"] = word_error_rate(reference, fp32["text"])
+            int8["wer"] = word_error_rate(reference, int8["text"])
+        print(
+            f"{fp32['fixture'][:16]:>16} | {fp32['p50_ms']:6.0f}ms | {int8['p50_ms']:6.0f}ms | "
+            f"{int8['p95_ms']:6.0f}ms | {fp32['p50_ms'] / int8['p50_ms']:6.2f}x | {int8['wer_vs_fp32']:7.1%} | "
+            + (f"{fp32['wer']:8.1%} | {int8['wer']:.1%}" if reference is not None else f"{'-':>8} | -")
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"model": args.model, "threads": args.threads, **runs}, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
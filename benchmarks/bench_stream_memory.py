@@ -0,0 +1,116 @@
+"""Benchmark: peak memory of streaming file transcription against file length
+
+Usage:
+    uv run python benchmarks/bench_stream_memory.py --model tiny --minutes 5 60
+    uv run python benchmarks/bench_stream_memory.py --model base --max-rss-mb 1500 --compare
+    uv run python benchmarks/bench_stream_memory.py --model base --backend faster-whisper
+
+Writes a synthetic recording of each length, transcribes it with
+stream_transcribe in a fresh process and reports that process's peak
+RSS (Linux/macOS). Exits non-zero when peak RSS grows by more than
+--max-growth-mb from the shortest to the longest file, or exceeds
+--max-rss-mb, so it doubles as the memory-cap check for the streaming
+path. --compare also transcribes the whole file in one call. Models run
+on the CPU (FORCE_CPU=1).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+from common import peak_rss_mb, synthetic_speech
+
+from audio_utils import WHISPER_SAMPLE_RATE, load_audio_file
+from backends import BACKENDS, DEFAULT_BACKEND, load_backend
+from transcription import stream_transcribe
+
+
+def write_recording(path, minutes):
+    """Write a speech-like 16 kHz WAV one minute at a time"""
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(WHISPER_SAMPLE_RATE)
+        for minute in range(minutes):
+            wav.writeframes(synthetic_speech(60, WHISPER_SAMPLE_RATE, seed=minute).tobytes())
+
+
+def run_child(path, backend_name, model_name, mode):
+    backend = load_backend(backend_name, model_name)
+    loaded_mb = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "stream":
+        segments = sum(1 for _ in stream_transcribe(backend, path, language="en"))
+    else:
+        segments = len(backend.transcribe(load_audio_file(path), language="en")["segments"])
+    print(json.dumps({
+        "peak_rss_mb": peak_rss_mb(),
+        "model_rss_mb": loaded_mb,
+        "segments": segments,
+        "seconds": time.perf_counter() - start,
+    }))
+
+
+def measure(path, backend_name, model_name, mode):
+    proc = subprocess.run(
+        [sys.executable, __file__, "--child", path, "--backend", backend_name, "--model", model_name, "--mode", mode],
+        capture_output=True, text=True, env=dict(os.environ, FORCE_CPU="1"),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip())
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--backend", choices=list(BACKENDS), default=DEFAULT_BACKEND)
+    parser.add_argument("--minutes", type=int, nargs="+", default=[5, 60])
+    parser.add_argument("--max-growth-mb", type=float, default=64)
+    parser.add_argument("--max-rss-mb", type=float, help="fail when any streaming run peaks above this")
+    parser.add_argument("--compare", action="store_true", help="also run model.transcribe on the whole file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", default="stream", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.backend, args.model, args.mode)
+        return 0
+
+    modes = ["stream", "whole"] if args.compare else ["stream"]
+    peaks = {}
+    print(f"Model {args.model} ({args.backend})")
+    print(f"{'file':>7} | {'mode':>6} | {'peak RSS':>9} | {'model':>8} | {'time':>7} | segments")
+    with tempfile.TemporaryDirectory() as tmp:
+        for minutes in sorted(args.minutes):
+            path = os.path.join(tmp, f"synthetic_{minutes}min.wav")
+            write_recording(path, minutes)
+            for mode in modes:
+                stats = measure(path, args.backend, args.model, mode)
+                peaks.setdefault(mode, []).append(stats["peak_rss_mb"])
+                print(
+                    f"{minutes:4d}min | {mode:>6} | {stats['peak_rss_mb']:6.0f} MB | "
+                    f"{stats['model_rss_mb']:5.0f} MB | {stats['seconds']:6.1f}s | {stats['segments']}"
+                )
+            os.remove(path)
+
+    growth = peaks["stream"][-1] - peaks["stream"][0]
+    failures = []
+    if len(peaks["stream"]) > 1 and growth > args.max_growth_mb:
+        failures.append(f"streaming peak RSS grew {growth:.0f} MB (limit {args.max_growth_mb:.0f} MB)")
+    if args.max_rss_mb and max(peaks["stream"]) > args.max_rss_mb:
+        failures.append(f"streaming peak RSS {max(peaks['stream']):.0f} MB over cap {args.max_rss_mb:.0f} MB")
+    print(f"\nStreaming peak RSS growth {min(args.minutes)}->{max(args.minutes)} min: {growth:+.0f} MB")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("PASS")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""Benchmark: VAD silence trimming, seconds removed and latency saved per clip
+
+Usage:
+    uv run python benchmarks/bench_vad.py                 # VAD cost only
+    uv run python benchmarks/bench_vad.py --model base    # + transcribe with/without VAD
+
+Clips mimic a typical dictation: a pause after F8, speech with internal
+pauses, and a pause before the second F8 press.
+"""
+import argparse
+
+from common import synthetic_speech, time_call
+
+import numpy as np
+
+from audio_utils import WHISPER_SAMPLE_RATE, to_whisper_audio
+from vad import trim_silence
+
+# (lead silence, speech, pause, speech, tail silence) in seconds
+LAYOUTS = {
+    "short": (1.0, 3.0, 0.0, 0.0, 1.0),
+    "paused": (1.5, 4.0, 3.0, 4.0, 1.5),
+    "long": (2.0, 20.0, 4.0, 20.0, 2.0),
+    "silent": (5.0, 0.0, 0.0, 0.0, 0.0),
+}
+
+
+def build_clip(layout, seed=0):
+    rng = np.random.default_rng(seed)
+
+    def noise(seconds):
+        return (0.002 * rng.standard_normal(int(seconds * WHISPER_SAMPLE_RATE))).astype(np.float32)
+
+    def speech(seconds):
+        if not seconds:
+            return np.zeros(0, dtype=np.float32)
+        return to_whisper_audio(synthetic_speech(seconds, 44100, seed), 44100)
+
+    lead, first, pause, second, tail = layout
+    return np.concatenate([noise(lead), speech(first), noise(pause), speech(second), noise(tail)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", help="Whisper model to time transcription with")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    model = None
+    if args.model:
+        import whisper
+        model = whisper.load_model(args.model, device="cpu")
+
+    print(f"{'clip':>7} | {'input':>6} | {'removed':>7} | {'vad':>7} | {'full':>8} | {'trimmed':>8} | {'saved':>8}")
+    for name, layout in LAYOUTS.items():
+        clip = build_clip(layout)
+        vad_ms, _, (trimmed, info) = time_call(lambda: trim_silence(clip), args.repeats)
+        row = f"{name:>7} | {info['input_seconds']:5.1f}s | {info['removed_seconds']:6.1f}s | {vad_ms:5.1f}ms"
+        if model is not None:
+            full_ms, _, _ = time_call(lambda: model.transcribe(clip, fp16=False), args.repeats)
+            trim_ms = 0.0
+            if trimmed.size:
+                trim_ms, _, _ = time_call(lambda: model.transcribe(trimmed, fp16=False), args.repeats)
+            saved = full_ms - trim_ms - vad_ms
+            row += f" | {full_ms:6.0f}ms | {trim_ms:6.0f}ms | {saved:6.0f}ms"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
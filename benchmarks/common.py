@@ -0,0 +1,78 @@
+"""Shared helpers for the FastSimple benchmark scripts"""
+import glob
+import os
+import resource
+import statistics
+import sys
+import time
+
+import numpy as np
+
+# Benchmarks live one level below the app modules
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+
+def synthetic_speech(duration, samplerate=44100, seed=0):
+    """Generate a speech-like int16 mono clip (voiced bursts separated by pauses)"""
+    rng = np.random.default_rng(seed)
+    n = int(duration * samplerate)
+    t = np.arange(n) / samplerate
+    pitch = 120 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    voiced = sum(np.sin(2 * np.pi * k * np.cumsum(pitch) / samplerate) / k for k in range(1, 6))
+    # ~0.6 s syllable groups with ~0.3 s gaps
+    envelope = (np.sin(2 * np.pi * t / 0.9) > -0.3).astype(np.float32)
+    signal = 0.3 * voiced * envelope + 0.003 * rng.standard_normal(n)
+    return (np.clip(signal, -1, 1) * 32767).astype(np.int16).reshape(-1, 1)
+
+
+def time_call(fn, repeats=5, warmup=1):
+    """Run fn repeatedly and return (median_ms, all_ms, last_result)"""
+    result = None
+    for _ in range(warmup):
+        result = fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), samples, result
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (Linux/macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def load_fixtures(fixtures_dir, lengths):
+    """[(name, seconds, 16 kHz float32 audio)] from WAV files or synthetic speech"""
+    from audio_utils import WHISPER_SAMPLE_RATE, load_audio_file, to_whisper_audio
+
+    if fixtures_dir:
+        paths = sorted(glob.glob(os.path.join(fixtures_dir, "*.wav")))
+        if not paths:
+            raise SystemExit(f"No .wav fixtures in {fixtures_dir}")
+        clips = [(os.path.basename(path), load_audio_file(path)) for path in paths]
+    else:
+        clips = [
+            (f"synthetic_{seconds:g}s", to_whisper_audio(synthetic_speech(seconds, WHISPER_SAMPLE_RATE), WHISPER_SAMPLE_RATE))
+            for seconds in lengths
+        ]
+    return [(name, len(audio) / WHISPER_SAMPLE_RATE, audio) for name, audio in clips]
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance over the reference length, ignoring case and punctuation"""
+    ref = [w.strip(".,!?;:\"'()").lower() for w in reference.split()]
+    hyp = [w.strip(".,!?;:\"'()").lower() for w in hypothesis.split()]
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    row = list(range(len(hyp) + 1))
+    for i, word in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, other in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (word != other))
+    return row[-1] / len(ref)
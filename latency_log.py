@@ -0,0 +1,117 @@
+"""Per-dictation stage timings appended to a rotating JSONL file
+
+Usage (summarize the log, including rotated files):
+    uv run python latency_log.py
+    uv run python latency_log.py --path /tmp/latency.jsonl --last 1000
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+import numpy as np
+
+DEFAULT_LOG_PATH = os.path.join(
+    os.environ.get("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state"),
+    "faststt", "latency.jsonl",
+)
+
+
+class StageTimer:
+    """Monotonic (perf_counter) timings of one dictation's stages, in ms
+
+    start is the hotkey press; stages that run more than once (e.g. the
+    decoder, once per token) accumulate. Stages timed with stage() also
+    record the process CPU time they used in cpu.
+    """
+
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.stages = {}
+        self.cpu = {}
+
+    def add(self, name, ms):
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+            self.cpu[name] = self.cpu.get(name, 0.0) + (time.process_time() - cpu_start) * 1000
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+
+class LatencyLog:
+    """Appends one JSON object per dictation, rotating at max_mb"""
+
+    def __init__(self, path=DEFAULT_LOG_PATH, max_mb=10, backups=3):
+        self.path = path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        handler = RotatingFileHandler(
+            path, maxBytes=int(max_mb * 1024 * 1024), backupCount=backups, encoding="utf-8",
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        # A private logger so records never reach the root logger's handlers
+        self._logger = logging.Logger(f"faststt.latency.{path}")
+        self._logger.addHandler(handler)
+
+    def write(self, record):
+        try:
+            self._logger.info(json.dumps(record, default=float))
+        except Exception as e:
+            print(f"[WARNING] Could not write latency log: {e}")
+
+
+def read_records(path=DEFAULT_LOG_PATH):
+    """All records in path and its rotated backups, oldest first"""
+    files = sorted(glob.glob(f"{glob.escape(path)}.*"), key=lambda name: -int(name.rsplit(".", 1)[1]))
+    records = []
+    for name in files + [path]:
+        try:
+            with open(name, encoding="utf-8") as f:
+                records.extend(json.loads(line) for line in f if line.strip())
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] Skipping {name}: {e}")
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize the dictation latency log")
+    parser.add_argument("--path", default=os.environ.get("LATENCY_LOG_PATH", DEFAULT_LOG_PATH))
+    parser.add_argument("--last", type=int, help="only the most recent N dictations")
+    args = parser.parse_args()
+
+    # Resource samples (TELEMETRY=1) share the file
+    records = [r for r in read_records(os.path.expanduser(args.path)) if r.get("type", "dictation") == "dictation"]
+    if args.last:
+        records = records[-args.last:]
+    if not records:
+        print(f"No records in {args.path}")
+        return
+    print(f"{len(records)} dictations from {args.path}\n")
+    # latency: stop (F8 or auto-stop) to text inserted
+    columns = {"latency": [r["latency_ms"] for r in records]}
+    for record in records:
+        for name, ms in record["stages"].items():
+            columns.setdefault(name, []).append(ms)
+    rtf = [r["rtf"] for r in records if r.get("rtf") is not None]
+    print(f"{'stage':>16} | {'count':>5} | {'p50':>8} | {'p95':>8} | {'p99':>8} | {'max':>8}")
+    for name, values in columns.items():
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        print(f"{name:>16} | {len(values):5d} | {p50:6.0f}ms | {p95:6.0f}ms | {p99:6.0f}ms | {max(values):6.0f}ms")
+    if rtf:
+        print(f"\nReal-time factor: p50 {np.percentile(rtf, 50):.3f}, p95 {np.percentile(rtf, 95):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Opt-in per-dictation profiling with cProfile and torch.profiler
+
+Usage (inspect a saved profile):
+    uv run python profiling.py ~/.local/state/faststt/profiles/20250101-120000-0001.pstats
+
+Chrome traces (*.trace.json) open in chrome://tracing or ui.perfetto.dev.
+"""
+import cProfile
+import glob
+import os
+import pstats
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+
+DEFAULT_PROFILE_DIR = os.path.join(
+    os.environ.get("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state"),
+    "faststt", "profiles",
+)
+
+
+class DictationProfiler:
+    """Profiles one dictation in every sample_every
+
+    A profiled dictation writes <stamp>.pstats (cProfile, the calling
+    thread) and, when torch_trace is set and the process has already
+    loaded torch, <stamp>.trace.json (torch profiler operator timeline) to
+    directory. Only the newest keep dictations' files are kept.
+    Dictations that are not sampled run without any profiler attached.
+    """
+
+    def __init__(self, directory=DEFAULT_PROFILE_DIR, sample_every=1, keep=50, torch_trace=True):
+        self.directory = os.path.expanduser(directory)
+        self.torch_trace = torch_trace
+        self.sample_every = max(1, int(sample_every))
+        self.keep = keep
+        self.count = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    @contextmanager
+    def profile(self):
+        """Profile the enclosed block if it is sampled; yields whether it is"""
+        self.count += 1
+        if (self.count - 1) % self.sample_every:
+            yield False
+            return
+
+        stem = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{self.count:04d}")
+        profiler = cProfile.Profile()
+        with ExitStack() as stack:
+            trace = self._torch_profiler() if self.torch_trace else None
+            if trace is not None:
+                stack.enter_context(trace)
+            profiler.enable()
+            try:
+                yield True
+            finally:
+                profiler.disable()
+        # Written after the block so the writes never show up in the profile
+        try:
+            profiler.dump_stats(stem + ".pstats")
+            if trace is not None:
+                trace.export_chrome_trace(stem + ".trace.json")
+            print(f"[PROFILE] Wrote {stem}.pstats" + (" and .trace.json" if trace is not None else ""))
+            self._prune()
+        except Exception as e:
+            print(f"[WARNING] Could not write profile: {e}")
+
+    @staticmethod
+    def _torch_profiler():
+        # Never the import that pulls torch into a process (e.g. a worker-mode front-end)
+        torch = sys.modules.get("torch")
+        if torch is None:
+            return None
+        from torch.profiler import ProfilerActivity, profile
+        activities = [ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(ProfilerActivity.CUDA)
+        return profile(activities=activities)
+
+    def _prune(self):
+        """Delete all but the newest keep profiles"""
+        stats = sorted(glob.glob(os.path.join(self.directory, "*.pstats")), key=os.path.getmtime)
+        for path in stats[:-self.keep] if self.keep else []:
+            for name in (path, path[:-len(".pstats")] + ".trace.json"):
+                try:
+                    os.remove(name)
+                except OSError:
+                    pass
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        pstats.Stats(path).sort_stats("cumulative").print_stats(30)
@@ -0,0 +1,127 @@
+"""Microphone capture helpers for the FastSimple apps"""
+import threading
+
+import numpy as np
+import sounddevice as sd
+
+from audio_utils import PreRollBuffer, StreamingResampler
+
+
+def input_samplerate():
+    """Default sample rate of the current input device"""
+    return int(sd.query_devices(kind="input")["default_samplerate"])
+
+
+class AudioRecorder:
+    """Callback-driven microphone capture into a RecordingBuffer
+
+    The PortAudio callback resamples each block to 16 kHz and copies it
+    into the preallocated buffer, counting input overflows/underflows so
+    dropped audio shows up in the logs instead of going unnoticed.
+
+    In hot mode the stream stays open between recordings. While idle the
+    callback only copies raw device-rate samples into a pre-roll ring
+    buffer; begin() resamples that pre-roll into the new recording, so
+    capture effectively starts before the hotkey was pressed.
+    """
+
+    def __init__(self, blocksize=1024, channels=1, hot=False, preroll_ms=300):
+        self.blocksize = blocksize
+        self.channels = channels
+        self.hot = hot
+        self.preroll_ms = preroll_ms
+        self.device_rate = None
+        self.stream = None
+        self.level = 0.0
+        # Optional hook called with each resampled block while recording
+        self.on_block = None
+        self._lock = threading.Lock()
+        self._preroll = None
+        self._target = None
+        self._resampler = None
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.blocks = 0
+        self.input_overflows = 0
+        self.input_underflows = 0
+
+    def open(self):
+        """Open the stream and keep it running between recordings (hot mode)"""
+        self.device_rate = input_samplerate()
+        self._preroll = PreRollBuffer(self.device_rate * self.preroll_ms / 1000)
+        self._start_stream()
+
+    def _start_stream(self):
+        self.stream = sd.InputStream(
+            samplerate=self.device_rate,
+            channels=self.channels,
+            dtype="float32",
+            blocksize=self.blocksize,
+            callback=self._callback,
+        )
+        self.stream.start()
+
+    def close(self):
+        """Stop and close the input stream"""
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+    def begin(self, buffer):
+        """Start capturing into buffer, opening the stream unless hot
+
+        Returns the seconds of pre-roll audio captured before this call.
+        """
+        if not self.hot:
+            self.device_rate = input_samplerate()
+        with self._lock:
+            self._reset_stats()
+            self._resampler = StreamingResampler(self.device_rate, buffer.samplerate)
+            preroll = np.zeros(0, dtype=np.float32)
+            if self.hot:
+                preroll = self._preroll.snapshot()
+                self._preroll.clear()
+                buffer.append(self._resampler.process(preroll))
+            self._target = buffer
+        if not self.hot:
+            # Target is set first so the very first callback block is kept
+            self._start_stream()
+        return preroll.size / self.device_rate
+
+    def end(self):
+        """Stop capturing, flush the resampler tail and return capture stats"""
+        with self._lock:
+            buffer = self._target
+            if buffer is not None:
+                buffer.append(self._resampler.flush())
+            self._target = None
+            self._resampler = None
+        if not self.hot:
+            self.close()
+        return {
+            "blocksize": self.blocksize,
+            "blocks": self.blocks,
+            "input_overflows": self.input_overflows,
+            "input_underflows": self.input_underflows,
+            "dropped_samples": buffer.dropped if buffer is not None else 0,
+        }
+
+    def _callback(self, indata, frames, time_info, status):
+        samples = indata[:, 0]
+        with self._lock:
+            if self._target is None:
+                if self._preroll is not None:
+                    self._preroll.append(samples)
+                return
+            if status.input_overflow:
+                self.input_overflows += 1
+            if status.input_underflow:
+                self.input_underflows += 1
+            self.blocks += 1
+            block = self._resampler.process(samples)
+            self._target.append(block)
+        self.level = float(np.abs(samples).mean())
+        if self.on_block is not None:
+            self.on_block(block)
@@ -0,0 +1,181 @@
+"""Background resource sampler writing Prometheus textfile metrics"""
+import os
+import sys
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:  # optional; /proc is read directly on Linux
+    psutil = None
+
+DEFAULT_TELEMETRY_DIR = os.path.join(
+    os.environ.get("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state"),
+    "faststt", "telemetry",
+)
+
+
+def _tensor_bytes(value):
+    if isinstance(value, (tuple, list)):
+        return sum(_tensor_bytes(item) for item in value)  # packed int8 (weight, bias)
+    if hasattr(value, "element_size"):
+        return value.numel() * value.element_size()
+    return 0
+
+
+def model_bytes(model):
+    """Bytes held by a torch model's weights, int8-quantized or not (0 for the worker client)"""
+    if not hasattr(model, "state_dict"):
+        return 0
+    return sum(_tensor_bytes(value) for value in model.state_dict().values())
+
+
+def _statm_rss(pid="self"):
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def process_stats():
+    """RSS of this process and of its child processes (e.g. the LanguageTool JVM), OS thread count"""
+    if psutil is not None:
+        proc = psutil.Process()
+        children = 0
+        for child in proc.children(recursive=True):
+            try:
+                children += child.memory_info().rss
+            except psutil.Error:
+                continue
+        return {"rss_bytes": proc.memory_info().rss, "children_rss_bytes": children, "os_threads": proc.num_threads()}
+    stats = {}
+    try:
+        stats["rss_bytes"] = _statm_rss()
+        with open("/proc/self/status") as f:
+            stats["os_threads"] = next(int(line.split()[1]) for line in f if line.startswith("Threads:"))
+        children = 0
+        for task in os.listdir("/proc/self/task"):
+            with open(f"/proc/self/task/{task}/children") as f:
+                for pid in f.read().split():
+                    try:
+                        children += _statm_rss(pid)
+                    except OSError:
+                        continue  # exited meanwhile
+        stats["children_rss_bytes"] = children
+    except (OSError, ValueError, AttributeError):
+        pass  # no /proc (Windows/macOS without psutil)
+    return stats
+
+
+def torch_stats():
+    """CUDA caching allocator stats, only once the process has imported torch and used CUDA"""
+    torch = sys.modules.get("torch")
+    if torch is None or not torch.cuda.is_available() or not torch.cuda.is_initialized():
+        return {}
+    return {
+        "cuda_allocated_bytes": torch.cuda.memory_allocated(),
+        "cuda_reserved_bytes": torch.cuda.memory_reserved(),
+        "cuda_peak_allocated_bytes": torch.cuda.max_memory_allocated(),
+    }
+
+
+# name -> (type, help) for everything sample() can return
+METRICS = {
+    "rss_bytes": ("gauge", "Resident memory of the app process"),
+    "children_rss_bytes": ("gauge", "Resident memory of child processes (LanguageTool JVM)"),
+    "model_bytes": ("gauge", "Memory held by the loaded model's weights"),
+    "cuda_allocated_bytes": ("gauge", "CUDA memory allocated by torch tensors"),
+    "cuda_reserved_bytes": ("gauge", "CUDA memory held by torch's caching allocator"),
+    "cuda_peak_allocated_bytes": ("gauge", "Peak CUDA memory allocated by torch tensors"),
+    "os_threads": ("gauge", "OS threads in the app process (including torch workers)"),
+    "python_threads": ("gauge", "Live Python threads (listeners, recorder, job worker)"),
+    "cpu_seconds_total": ("counter", "CPU time used by the app process"),
+    "pending_jobs": ("gauge", "Recordings queued or being transcribed"),
+    "dictations_total": ("counter", "Dictations processed"),
+}
+
+
+class ResourceSampler:
+    """Samples process resources every interval_s on a daemon thread
+
+    Each sample rewrites textfile atomically (node_exporter textfile
+    collector format) and, when log is given, appends a JSON record to it.
+    gauges() supplies app-level values such as pending_jobs. observe()
+    adds a finished dictation's StageTimer to per-stage wall/CPU counters.
+    Between samples the thread only waits on an Event.
+    """
+
+    def __init__(self, textfile, interval_s=15.0, log=None, labels=None, gauges=None):
+        self.textfile = os.path.expanduser(textfile)
+        self.interval_s = interval_s
+        self.log = log
+        self.labels = ",".join(f'{key}="{value}"' for key, value in (labels or {}).items())
+        self.gauges = gauges
+        self.dictations = 0
+        self.stage_seconds = {}
+        self.stage_cpu_seconds = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        os.makedirs(os.path.dirname(self.textfile) or ".", exist_ok=True)
+
+    def observe(self, timer):
+        with self._lock:
+            self.dictations += 1
+            for name, ms in timer.stages.items():
+                self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + ms / 1000
+            for name, ms in timer.cpu.items():
+                self.stage_cpu_seconds[name] = self.stage_cpu_seconds.get(name, 0.0) + ms / 1000
+
+    def sample(self):
+        values = process_stats()
+        values.update(torch_stats())
+        values["python_threads"] = threading.active_count()
+        values["cpu_seconds_total"] = time.process_time()
+        if self.gauges is not None:
+            values.update(self.gauges())
+        with self._lock:
+            values["dictations_total"] = self.dictations
+            values["stage_seconds_total"] = dict(self.stage_seconds)
+            values["stage_cpu_seconds_total"] = dict(self.stage_cpu_seconds)
+        return values
+
+    def prometheus_text(self, values):
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            if values.get(name) is None:
+                continue
+            metric = f"faststt_{name}"
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}", f"{metric}{{{self.labels}}} {values[name]}"]
+        for name, help_text in (
+            ("stage_seconds_total", "Wall time spent in each dictation stage"),
+            ("stage_cpu_seconds_total", "Process CPU time spent in each dictation stage"),
+        ):
+            metric = f"faststt_{name}"
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+            labels = f"{self.labels}," if self.labels else ""
+            lines += [f'{metric}{{{labels}stage="{stage}"}} {seconds}' for stage, seconds in sorted(values[name].items())]
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        values = self.sample()
+        tmp = f"{self.textfile}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text(values))
+            os.replace(tmp, self.textfile)  # the collector never sees a half-written file
+        except OSError as e:
+            print(f"[WARNING] Could not write telemetry: {e}")
+        if self.log is not None:
+            self.log.write({"type": "resources", "time": time.time(), **values})
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        print(f"[OK] Telemetry every {self.interval_s:g}s to {self.textfile}")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        self.write()
+        while not self._stop.wait(self.interval_s):
+            self.write()
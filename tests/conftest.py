@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Tests import the app modules, which live one level up
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
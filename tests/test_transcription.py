@@ -0,0 +1,97 @@
+"""Word-timestamp merging in live typing and sharded batch transcription"""
+import numpy as np
+
+from audio_utils import WHISPER_SAMPLE_RATE
+from transcription import LiveDictation, stitch_shards
+
+VOCAB = ["a", "I", "the", "cat", "saw", "today", "and", "left", "quickly", "it", "was"]
+
+
+def spoken_words(rng, count=60):
+    """(word, start, end) with short words like "a"/"I" lasting 30 ms"""
+    words, t = [], 0.3
+    for _ in range(count):
+        word = VOCAB[rng.integers(len(VOCAB))]
+        duration = 0.03 if word in ("a", "I") else rng.uniform(0.15, 0.4)
+        words.append((" " + word, t, t + duration))
+        t += duration + rng.uniform(0.0, 0.12)
+    return words, t + 0.5
+
+
+class GrowingBuffer:
+    def __init__(self):
+        self.audio = np.zeros(0, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.audio)
+
+    def view(self):
+        return self.audio
+
+
+def live_dictation(seed, jitter):
+    """Run LiveDictation over words whose timestamps jitter on every decode"""
+    rng = np.random.default_rng(seed)
+    words, total = spoken_words(rng)
+    buffer = GrowingBuffer()
+    typed = []
+
+    def transcribe(audio, prompt):
+        start = live.window_start / WHISPER_SAMPLE_RATE
+        end = start + len(audio) / WHISPER_SAMPLE_RATE
+        decoded = []
+        for word, word_start, word_end in words:
+            # Whisper also decodes a word cut off at the window start
+            if word_end > start + 0.02 and word_start < end - 0.1:
+                s = min(max(word_start + rng.normal(0, jitter), start), end)
+                e = min(max(word_end + rng.normal(0, jitter), s), end)
+                decoded.append({"word": word, "start": s - start, "end": e - start})
+        return {"segments": [{"words": decoded}]}
+
+    live = LiveDictation(buffer, transcribe, typed.append, max_window_s=3.0)
+    while len(buffer) < total * WHISPER_SAMPLE_RATE:
+        buffer.audio = np.zeros(len(buffer) + WHISPER_SAMPLE_RATE, dtype=np.float32)
+        live._step()
+    live._step(final=True)
+    return "".join(typed).split(), [word.strip() for word, _, _ in words]
+
+
+def test_live_typing_never_retypes_across_window_slides():
+    for seed in range(10):
+        for jitter in (0.0, 0.01, 0.02):
+            typed, spoken = live_dictation(seed, jitter)
+            assert typed == spoken, (seed, jitter)
+
+
+def decode_shard(rng, words, start, end, jitter):
+    """One shard's (start, end, word) list, with timestamps of its own decode"""
+    shard = []
+    for word, word_start, word_end in words:
+        if word_end > start and word_start < end:
+            s = word_start + rng.normal(0, jitter)
+            shard.append((s, max(s, word_end + rng.normal(0, jitter)), word))
+    return shard
+
+
+def test_stitch_shards_keeps_every_word_when_shards_disagree_on_timestamps():
+    for seed in range(200):
+        rng = np.random.default_rng(seed)
+        words, total = spoken_words(rng, count=40)
+        # A cut inside a word, as plan_cuts makes when it finds no pause
+        _, word_start, word_end = words[20]
+        cuts = [(word_start + word_end) / 2]
+        for jitter in (0.02, 0.05):
+            shards = [
+                decode_shard(rng, words, 0.0, cuts[0] + 2.0, jitter),
+                decode_shard(rng, words, cuts[0] - 2.0, total, jitter),
+            ]
+            stitched = stitch_shards(shards, cuts).split()
+            assert stitched == [word.strip() for word, _, _ in words], (seed, jitter)
+
+
+def test_stitch_shards_keeps_words_really_repeated_at_a_join():
+    shards = [
+        [(2.5, 2.8, " I"), (2.8, 2.95, " said"), (2.95, 3.05, " no.")],
+        [(2.8, 2.95, " said"), (2.95, 3.05, " no."), (3.15, 3.3, " No"), (3.3, 3.6, " way.")],
+    ]
+    assert stitch_shards(shards, [3.1]) == "I said no. No way."
@@ -0,0 +1,259 @@
+"""Persistent transcription worker shared by the FastSimple front-ends
+
+Loads the Whisper model once and serves transcription requests from any
+number of app windows over a local Unix socket. Audio is handed over in
+shared memory, so only a small JSON header crosses the socket and the
+front-ends never import torch or hold a copy of the model.
+
+Usage:
+    uv run python transcribe_worker.py
+
+Front-ends started with TRANSCRIBE_WORKER=1 connect to it, and start it
+in the background when it is not running yet.
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from audio_utils import WHISPER_SAMPLE_RATE
+from backends import DEFAULT_BACKEND, load_backend
+from transcription import TranscriptionCancelled, decode_path
+
+WORKER_SOCKET = "/tmp/faststt_transcribe.sock"
+MODEL_NAME = "large-v3-turbo"
+# How long a front-end waits for a freshly spawned worker to load the model
+SPAWN_TIMEOUT_S = 180
+
+
+def _send(sock, message):
+    sock.sendall(json.dumps(message, default=float).encode() + b"\n")
+
+
+def _receive(sock):
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    return json.loads(data) if data else None
+
+
+def _attach(name):
+    """Attach to a client's shared memory block without taking ownership"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        # Older Pythons register every attach and unlink it when we exit
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class TranscriptionWorker:
+    """Owns the model and answers ping/transcribe requests on a Unix socket
+
+    Each connection carries one request. Requests from different windows
+    are handled on their own threads but share one model, so inference is
+    serialized behind a lock. A cancel request names a pending transcribe
+    by its shared memory block and aborts it at the next audio window.
+    """
+
+    def __init__(self, model_name=MODEL_NAME, socket_path=WORKER_SOCKET):
+        self.model_name = model_name
+        self.socket_path = socket_path
+        self.short_clip_enabled = os.environ.get("SHORT_CLIP", "0") == "1"
+        self.batched_enabled = os.environ.get("BATCHED_DECODE", "0") == "1"
+        self.backend_name = os.environ.get("BACKEND", DEFAULT_BACKEND)
+        self.model = None
+        self.device = None
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._pending = {}  # shm name -> cancel event of queued/running requests
+
+    def load_model(self):
+        print(f"Loading model: {self.model_name} ({self.backend_name})")
+        self.model = load_backend(
+            self.backend_name, self.model_name, short_clip=self.short_clip_enabled, batched=self.batched_enabled,
+        )
+        self.device = self.model.device
+        print(f"[OK] Model loaded on {self.device.upper()}")
+
+    def transcribe(self, audio, initial_prompt=None, cancel=None, **options):
+        """Same decoding path the apps use in-process"""
+        with self._lock:
+            return self.model.transcribe(audio, initial_prompt, cancel, **options)
+
+    def handle(self, conn):
+        try:
+            request = _receive(conn)
+            if request is None:
+                return
+            if request["op"] == "ping":
+                # The decode settings actually applied, which front-ends put in cache keys
+                _send(conn, {
+                    "model": self.model_name, "backend": self.backend_name, "device": self.device.upper(),
+                    "short_clip": getattr(self.model, "short_clip", False),
+                    "batched": getattr(self.model, "batched", False),
+                    "pid": os.getpid(),
+                })
+                return
+            if request["op"] == "cancel":
+                cancel = self._pending.get(request["shm"])
+                if cancel is not None:
+                    cancel.set()
+                _send(conn, {"cancelled": cancel is not None})
+                return
+
+            start = time.perf_counter()
+            shm = _attach(request["shm"])
+            try:
+                audio = np.ndarray((request["samples"],), dtype=np.float32, buffer=shm.buf).copy()
+            finally:
+                shm.close()
+            cancel = self._pending[request["shm"]] = threading.Event()
+            try:
+                result = self.transcribe(audio, cancel=cancel, **request.get("options", {}))
+            except TranscriptionCancelled:
+                print("[WORKER] Request cancelled")
+                _send(conn, {"cancelled": True})
+                return
+            finally:
+                self._pending.pop(request["shm"], None)
+            self.requests += 1
+            print(
+                f"[WORKER] {len(audio) / WHISPER_SAMPLE_RATE:.1f}s audio in "
+                f"{(time.perf_counter() - start) * 1000:.0f}ms (request {self.requests})"
+            )
+            _send(conn, result)
+        except Exception as e:
+            print(f"[WARNING] Worker request failed: {e}")
+            try:
+                _send(conn, {"error": str(e)})
+            except OSError:
+                pass
+        finally:
+            conn.close()
+
+    def serve(self):
+        self.load_model()
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.socket_path)
+        sock.listen(8)
+        print(f"[OK] Transcription worker listening on {self.socket_path}")
+        try:
+            while True:
+                conn, _ = sock.accept()
+                threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sock.close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+
+class WorkerClient:
+    """Stand-in for a loaded model that forwards transcribe() to the worker"""
+
+    def __init__(self, socket_path=WORKER_SOCKET):
+        self.socket_path = socket_path
+        self.device = None
+        self.model_name = None
+        self.backend = None
+        self.short_clip = False
+        self.batched = False
+        self._in_flight = {}  # shm name -> caller's cancel event
+
+    def request(self, message):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.socket_path)
+            _send(sock, message)
+            return _receive(sock)
+
+    def ping(self):
+        info = self.request({"op": "ping"})
+        self.device = info["device"]
+        self.model_name = info["model"]
+        self.backend = info.get("backend", "whisper")  # workers started before BACKEND existed
+        self.short_clip = info.get("short_clip", False)
+        self.batched = info.get("batched", False)
+        return info
+
+    def transcribe(self, audio, cancel=None, **options):
+        """Transcribe 16 kHz float32 audio; returns the worker's result dict
+
+        Setting cancel and then calling cancel() aborts the request, which
+        raises TranscriptionCancelled here.
+        """
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        shm = shared_memory.SharedMemory(create=True, size=max(audio.nbytes, 1))
+        self._in_flight[shm.name] = cancel
+        try:
+            view = np.ndarray(audio.shape, dtype=np.float32, buffer=shm.buf)
+            view[:] = audio
+            del view  # shm.close() fails while a view is still exported
+            result = self.request({
+                "op": "transcribe", "shm": shm.name, "samples": audio.size, "options": options,
+            })
+        finally:
+            self._in_flight.pop(shm.name, None)
+            shm.close()
+            shm.unlink()
+        if result is not None and result.get("cancelled"):
+            raise TranscriptionCancelled()
+        if result is None or "error" in result:
+            raise RuntimeError(f"Transcription worker failed: {(result or {}).get('error', 'no reply')}")
+        return result
+
+    def decode_path(self, audio, **options):
+        """Decoder the worker will run for audio, from the settings it reported"""
+        return decode_path(audio, self.short_clip, self.batched, **options)
+
+    def cancel(self):
+        """Ask the worker to abort in-flight requests whose cancel event is set"""
+        for name, cancel in list(self._in_flight.items()):
+            if cancel is not None and cancel.is_set():
+                self.request({"op": "cancel", "shm": name})
+
+
+def connect_worker(socket_path=WORKER_SOCKET, timeout=SPAWN_TIMEOUT_S):
+    """Connect to the running worker, starting one in the background if needed"""
+    client = WorkerClient(socket_path)
+    try:
+        client.ping()
+        return client
+    except OSError:
+        pass
+
+    print("Starting transcription worker...")
+    script = os.path.abspath(__file__)
+    subprocess.Popen(
+        [sys.executable, script], cwd=os.path.dirname(script), start_new_session=True,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(0.5)
+        try:
+            client.ping()
+            return client
+        except OSError:
+            continue
+    raise RuntimeError(f"Transcription worker did not start within {timeout}s")
+
+
+if __name__ == "__main__":
+    TranscriptionWorker().serve()
@@ -0,0 +1,115 @@
+"""On-disk cache of transcription results keyed by audio content"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "faststt", "transcripts",
+)
+
+
+class TranscriptCache:
+    """Content-addressed transcription cache with size-bounded LRU eviction
+
+    Keys hash the audio re-quantized to 16-bit PCM (an exact round trip
+    for recordings and WAV files) together with the model name and every
+    decode option. Each entry is one JSON file: reads refresh its mtime, and
+    writes evict the least recently used entries once the directory
+    grows past max_mb. Several processes can share one directory.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_mb=256):
+        self.directory = directory
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._entries())
+
+    def key(self, audio, model_name, **options):
+        """Hash of the normalized PCM, model name and decode options"""
+        pcm = np.clip(np.rint(np.asarray(audio, dtype=np.float32) * 32768), -32768, 32767).astype("<i2")
+        digest = hashlib.sha256(pcm.tobytes())
+        digest.update(json.dumps([model_name, options], sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def transcript_key(self, audio, model_name, device, backend="whisper", path="full", prompt=None, language=None,
+                       **options):
+        """key() as the apps, batch_transcribe.py and api_server.py all build it
+
+        path names the decoder that produces the result (see
+        transcription.decode_path; "batched_clip" is api_server.py's
+        transcribe_batch), so only results of the same decoder are shared.
+        Going through here means an entry written by one front-end is hit
+        by the others for the same audio and settings. Options that are
+        None or False (no prompt) are left out.
+        """
+        options = dict(options, prompt=prompt, language=language)
+        options = {name: value for name, value in options.items() if value is not None and value is not False}
+        return self.key(audio, model_name, device=device.lower(), backend=backend, path=path, **options)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key):
+        """Cached result for key, or None (counted as a miss)"""
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        path = self._path(key)
+        data = json.dumps(result, default=float).encode()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[WARNING] Could not write transcription cache: {e}")
+            return
+        self._size += len(data)
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _entries(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # evicted by another process
+                yield path, stat.st_size, stat.st_mtime
+
+    def _evict(self):
+        """Delete least recently used entries down to 90% of the size limit"""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self._size = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self._size <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+
+    def stats(self):
+        total = self.hits + self.misses
+        if not total:
+            return "no lookups"
+        return f"{self.hits} hits / {self.misses} misses, {self.hits / total:.0%} hit rate"
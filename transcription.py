@@ -0,0 +1,702 @@
+"""Transcription helpers shared by the FastSimple apps"""
+import os
+import re
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+from difflib import SequenceMatcher
+
+import numpy as np
+
+from audio_utils import WHISPER_SAMPLE_RATE, iter_audio_file
+from vad import find_pause, trim_silence
+
+# Whisper's initial_prompt is capped at ~224 tokens; the last few
+# sentences are enough to carry names, casing and punctuation forward
+PROMPT_CHARS = 200
+
+# Live typing: word timestamps move by tens of ms between decodes, so the
+# window slides this far short of confirmed speech and words this close to
+# it are checked against the typed text
+LIVE_MARGIN_S = 0.25
+LIVE_JITTER_S = 0.08
+
+# Batch shards: how far two decodes' timestamps for one word may disagree
+SHARD_JITTER_S = 0.08
+
+# Encoder input lengths (seconds) used for short clips. Each bucket is a
+# prefix of Whisper's 30 s / 1500-position audio context.
+SHORT_CLIP_BUCKETS = (5, 10, 15, 20)
+
+# Long dictations are cut at pauses into pieces of at most one Whisper
+# window, decoded this many at a time
+MAX_SEGMENT_SECONDS = 30
+DECODE_BATCH_SIZE = 8
+
+# Same fallback thresholds model.transcribe uses for temperature retries
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+class TranscriptionCancelled(Exception):
+    """Raised inside a decode once its cancel event is set"""
+
+
+def load_whisper_model(model_name):
+    """Load a Whisper model on CUDA when available; returns (model, device)
+
+    FORCE_CPU=1 keeps it on the CPU. INT8_CPU=1 quantizes a CPU model to
+    int8 (device "cpu-int8"). torch/whisper are imported here so
+    front-ends that use the transcription worker never load them.
+    """
+    import torch
+    import whisper
+
+    force_cpu = os.environ.get("FORCE_CPU", "0") == "1"
+    if force_cpu:
+        device = "cpu"
+    elif torch.cuda.is_available():
+        device = "cuda"
+    else:
+        device = "cpu"
+
+    model = whisper.load_model(model_name, device=device)
+    if device == "cuda":
+        print(f"   GPU: {torch.cuda.get_device_name(0)}")
+    elif os.environ.get("INT8_CPU", "0") == "1":
+        quantize_int8(model)
+        device = "cpu-int8"
+        print("   Linear layers quantized to int8")
+    return model, device
+
+
+def quantize_int8(model):
+    """Dynamic int8 quantization of a CPU model's linear layers, in place
+
+    Weights are stored as int8 and activations are quantized per batch on
+    the fly, so attention projections and MLPs run as int8 GEMMs. The conv
+    stem and the token embedding (which also produces the logits) stay fp32.
+    """
+    import torch
+    import whisper.model
+
+    # whisper's Linear only adds an fp16 cast, but quantize_dynamic swaps exact nn.Linear only
+    for module in model.modules():
+        if type(module) is whisper.model.Linear:
+            module.__class__ = torch.nn.Linear
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # eager-mode quantization deprecation notice
+        torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+@contextmanager
+def truncated_encoder(model, n_frames):
+    """Temporarily let the audio encoder accept n_frames mel frames
+
+    The encoder asserts its input matches the positional embedding, so the
+    embedding buffer is swapped for its first n_frames // 2 rows (the conv
+    stem halves the frame count). dims.n_audio_ctx is shrunk to match so
+    language detection recognises the features as already encoded.
+    """
+    encoder = model.encoder
+    full = encoder.positional_embedding
+    n_audio_ctx = model.dims.n_audio_ctx
+    encoder.positional_embedding = full[:n_frames // 2]
+    model.dims.n_audio_ctx = n_frames // 2
+    try:
+        yield
+    finally:
+        encoder.positional_embedding = full
+        model.dims.n_audio_ctx = n_audio_ctx
+
+
+@contextmanager
+def cancellable(model, cancel):
+    """Raise TranscriptionCancelled at the next audio window once cancel is set
+
+    Every decoding path (transcribe's 30 s windows and temperature
+    retries, short clips, batches) starts by running the encoder, so a
+    forward pre-hook on it is a checkpoint between segments.
+    """
+    if cancel is None:
+        yield
+        return
+
+    def check(module, args):
+        if cancel.is_set():
+            raise TranscriptionCancelled()
+
+    handle = model.encoder.register_forward_pre_hook(check)
+    try:
+        yield
+    finally:
+        handle.remove()
+
+
+@contextmanager
+def timed_stages(model, timer):
+    """Add log-mel, encoder and decoder time on the calling thread to a StageTimer
+
+    Other threads using the model meanwhile (e.g. incremental decoding of
+    the next recording) are not counted. On CUDA each forward is
+    synchronized so the time covers the kernels, not just their launch.
+    """
+    import importlib
+
+    import torch
+    import whisper
+
+    # log_mel_spectrogram is a function, not a module, so it is wrapped where it is looked up
+    mel_modules = [whisper, importlib.import_module("whisper.transcribe")]
+    log_mel_spectrogram = whisper.log_mel_spectrogram
+
+    thread = threading.get_ident()
+    cuda = next(model.parameters()).is_cuda
+    starts = {}
+
+    def before(name):
+        def hook(module, args):
+            if threading.get_ident() == thread:
+                if cuda:
+                    torch.cuda.synchronize()
+                starts[name] = time.perf_counter()
+        return hook
+
+    def after(name):
+        def hook(module, args, output):
+            if threading.get_ident() == thread and name in starts:
+                if cuda:
+                    torch.cuda.synchronize()
+                timer.add(name, (time.perf_counter() - starts.pop(name)) * 1000)
+        return hook
+
+    def timed_mel(*args, **kwargs):
+        if threading.get_ident() != thread:
+            return log_mel_spectrogram(*args, **kwargs)
+        start = time.perf_counter()
+        mel = log_mel_spectrogram(*args, **kwargs)
+        if cuda:
+            torch.cuda.synchronize()
+        timer.add("mel", (time.perf_counter() - start) * 1000)
+        return mel
+
+    handles = []
+    for name in ("encoder", "decoder"):
+        module = getattr(model, name)
+        handles.append(module.register_forward_pre_hook(before(name)))
+        handles.append(module.register_forward_hook(after(name)))
+    for module in mel_modules:
+        module.log_mel_spectrogram = timed_mel
+    try:
+        yield
+    finally:
+        for module in mel_modules:
+            module.log_mel_spectrogram = log_mel_spectrogram
+        for handle in handles:
+            handle.remove()
+
+
+def transcribe_short(model, audio, prompt=None, fp16=False, buckets=SHORT_CLIP_BUCKETS):
+    """Decode a short clip with the encoder truncated to the nearest bucket
+
+    Returns a transcribe()-shaped dict, or None when the clip is longer
+    than the largest bucket or the result fails the quality guard (the
+    caller then falls back to the regular 30 s padded path).
+    """
+    import whisper
+    from whisper.audio import FRAMES_PER_SECOND
+
+    duration = len(audio) / WHISPER_SAMPLE_RATE
+    bucket = next((b for b in buckets if duration <= b), None)
+    if bucket is None:
+        return None
+
+    n_frames = bucket * FRAMES_PER_SECOND
+    mel = whisper.log_mel_spectrogram(
+        audio, model.dims.n_mels, padding=bucket * WHISPER_SAMPLE_RATE - len(audio),
+        device=model.device,
+    )
+    mel = whisper.pad_or_trim(mel, n_frames)
+    options = whisper.DecodingOptions(
+        prompt=prompt, fp16=fp16, temperature=0.0, without_timestamps=True,
+    )
+    with truncated_encoder(model, n_frames):
+        result = whisper.decode(model, mel, options)
+
+    if _unreliable(result):
+        print(
+            f"[SHORT] {bucket}s bucket rejected (logprob {result.avg_logprob:.2f}, "
+            f"compression {result.compression_ratio:.2f}), using full window"
+        )
+        return None
+    return {
+        "text": _decoded_text(result), "segments": [], "language": result.language,
+        "short_clip_bucket": bucket,
+    }
+
+
+def _unreliable(result):
+    """True when a greedy decode would have triggered a temperature retry"""
+    return (
+        result.compression_ratio > COMPRESSION_RATIO_THRESHOLD
+        or (result.avg_logprob < LOGPROB_THRESHOLD and result.no_speech_prob < NO_SPEECH_THRESHOLD)
+    )
+
+
+def _decoded_text(result):
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+        return ""
+    return result.text
+
+
+def transcribe_batch(model, clips, prompt=None, language=None, fp16=False):
+    """Decode several clips of up to 30 s in one batched forward pass
+
+    Every clip is padded to the 30 s window and the stack goes through
+    the encoder and greedy decoder together. Returns one transcribe()-
+    shaped dict per clip, or None where the quality guard rejects the
+    result (the caller then runs model.transcribe on that clip alone).
+    """
+    import torch
+    import whisper
+    from whisper.audio import N_FRAMES, N_SAMPLES
+
+    mels = torch.stack([
+        whisper.pad_or_trim(
+            whisper.log_mel_spectrogram(
+                clip, model.dims.n_mels, padding=max(N_SAMPLES - len(clip), 0), device=model.device,
+            ),
+            N_FRAMES,
+        )
+        for clip in clips
+    ])
+    options = whisper.DecodingOptions(
+        prompt=prompt, language=language, fp16=fp16, temperature=0.0, without_timestamps=True,
+    )
+    results = []
+    for result in whisper.decode(model, mels, options):
+        if _unreliable(result):
+            results.append(None)
+        else:
+            results.append({"text": _decoded_text(result), "segments": [], "language": result.language})
+    return results
+
+
+def split_at_pauses(audio, samplerate=WHISPER_SAMPLE_RATE, max_segment_s=MAX_SEGMENT_SECONDS,
+                    min_segment_s=5, min_pause_ms=300):
+    """(start, end) sample ranges of at most max_segment_s, cut at the latest pause
+
+    Falls back to a hard cut at max_segment_s where a stretch has no
+    pause after min_segment_s.
+    """
+    max_len = int(max_segment_s * samplerate)
+    min_len = int(min_segment_s * samplerate)
+    ranges = []
+    start = 0
+    while len(audio) - start > max_len:
+        cut = find_pause(audio[start:start + max_len], samplerate, min_pause_ms)
+        cut = max_len if cut is None or cut < min_len else int(cut)
+        ranges.append((start, start + cut))
+        start += cut
+    if start < len(audio):
+        ranges.append((start, len(audio)))
+    return ranges
+
+
+def transcribe_long_batched(model, audio, prompt=None, fp16=False, batch_size=DECODE_BATCH_SIZE):
+    """Transcribe a long recording as a batch of pause-aligned segments
+
+    Instead of Whisper's sequential 30 s sliding window, the audio is cut
+    at pauses (split_at_pauses) and up to batch_size segments at a time
+    go through the encoder and decoder together. Every segment gets the
+    same prompt, as later ones cannot wait for the earlier text. Segments
+    rejected by the quality guard are redone with model.transcribe.
+    """
+    ranges = split_at_pauses(audio)
+    clips = [audio[start:end] for start, end in ranges]
+    texts = []
+    redone = 0
+    for i in range(0, len(clips), batch_size):
+        batch = clips[i:i + batch_size]
+        for clip, result in zip(batch, transcribe_batch(model, batch, prompt=prompt, fp16=fp16)):
+            if result is None:
+                redone += 1
+                result = model.transcribe(clip, fp16=fp16, initial_prompt=prompt)
+            texts.append(result["text"].strip())
+    return {
+        "text": " ".join(text for text in texts if text),
+        "segments": [],
+        "batched_segments": len(clips),
+        "redone_segments": redone,
+    }
+
+
+def decode_path(audio, short_clip=False, batched=False, **options):
+    """Which decoder transcribe_audio runs for audio: "batched_long", "short_clip" or "full"
+
+    Part of transcript cache keys: the paths can return different text for
+    the same audio.
+    """
+    if options:
+        return "full"
+    if batched and len(audio) > MAX_SEGMENT_SECONDS * WHISPER_SAMPLE_RATE:
+        return "batched_long"
+    if short_clip and len(audio) <= SHORT_CLIP_BUCKETS[-1] * WHISPER_SAMPLE_RATE:
+        return "short_clip"
+    return "full"
+
+
+def transcribe_audio(model, audio, prompt=None, fp16=False, short_clip=False, batched=False, **options):
+    """The apps' decoding path for one dictation
+
+    Long audio goes through transcribe_long_batched when batched is set,
+    short clips through transcribe_short when short_clip is set (both only
+    without extra decode options), everything else through model.transcribe.
+    """
+    path = decode_path(audio, short_clip, batched, **options)
+    if path == "batched_long":
+        result = transcribe_long_batched(model, audio, prompt=prompt, fp16=fp16)
+        print(
+            f"[BATCH] {result['batched_segments']} segments decoded as a batch "
+            f"({result['redone_segments']} redone)"
+        )
+        return result
+    if path == "short_clip":
+        result = transcribe_short(model, audio, prompt=prompt, fp16=fp16)
+        if result is not None:
+            return result
+    return model.transcribe(audio, fp16=fp16, initial_prompt=prompt, **options)
+
+
+def add_punctuation(text):
+    """Add intelligent punctuation to text"""
+    if not text:
+        return text
+
+    text = text.strip()
+    if not text.endswith((".", "!", "?", ";", ":")):
+        question_words = ["what", "how", "why", "when", "where", "who", "which", "whose", "whom"]
+        if any(text.lower().startswith(word) for word in question_words):
+            text += "?"
+        else:
+            text += "."
+    text += " "
+    if text:
+        text = text[0].upper() + text[1:]
+    text = re.sub(r"\s+(and|but|or|so|yet|for|nor)\s+", r", \1 ", text)
+    text = re.sub(r"\s+([.!?])", r"\1", text)
+    text = re.sub(r"([.!?])([A-Za-z])", r"\1 \2", text)
+    return text
+
+
+def stream_transcribe(backend, path, window_s=30.0, **options):
+    """Yield {"start", "end", "text"} segments of a media file in bounded memory
+
+    Transcribing a whole file holds the decoded audio and its full mel
+    spectrogram, so memory grows with file length. Here the file is
+    decoded block by block into a window of at most window_s seconds,
+    whose segments come from backend.segments (see backends.py). The last segment of a window may be
+    cut off, so unless the file has ended it is dropped and its audio is
+    carried into the next window; earlier text is passed on as prompt.
+    """
+    window = int(window_s * WHISPER_SAMPLE_RATE)
+    blocks = iter_audio_file(path)
+    buffer = np.zeros(0, dtype=np.float32)
+    offset = 0.0  # file time of buffer[0]
+    prompt = None
+    ended = False
+    try:
+        while True:
+            pieces = [buffer]
+            filled = len(buffer)
+            while not ended and filled < window:
+                block = next(blocks, None)
+                if block is None:
+                    ended = True
+                else:
+                    pieces.append(block)
+                    filled += len(block)
+            buffer = np.concatenate(pieces)
+            if not len(buffer):
+                return
+
+            segments = list(backend.segments(buffer, prompt, **options))
+            consumed = len(buffer)
+            if not ended and len(segments) > 1:
+                segments = segments[:-1]
+                consumed = min(int(segments[-1]["end"] * WHISPER_SAMPLE_RATE), len(buffer)) or len(buffer)
+
+            for segment in segments:
+                text = segment["text"].strip()
+                if text:
+                    yield {"start": offset + segment["start"], "end": offset + segment["end"], "text": text}
+            texts = " ".join(segment["text"].strip() for segment in segments)
+            prompt = ((prompt or "") + " " + texts).strip()[-PROMPT_CHARS:] or None
+            buffer = buffer[consumed:]
+            offset += consumed / WHISPER_SAMPLE_RATE
+            if ended and not len(buffer):
+                return
+    finally:
+        blocks.close()  # stops ffmpeg when the caller stops early
+
+
+class IncrementalTranscriber:
+    """Transcribe finished speech segments in the background while recording
+
+    Polls the growing RecordingBuffer, cuts it at VAD pauses once at
+    least min_segment_s of new audio is available (or forcibly at
+    max_segment_s) and transcribes each segment with the previous text as
+    prompt. finish() then only has the tail since the last cut left to
+    decode, so post-stop latency stays flat however long the dictation.
+
+    transcribe_fn(audio, prompt) must return the segment text.
+    """
+
+    def __init__(self, buffer, transcribe_fn, min_segment_s=4.0, max_segment_s=25.0,
+                 min_pause_ms=400, poll_s=0.25, trim=True, samplerate=WHISPER_SAMPLE_RATE):
+        self.buffer = buffer
+        self.transcribe_fn = transcribe_fn
+        self.samplerate = samplerate
+        self.min_segment = int(min_segment_s * samplerate)
+        self.max_segment = int(max_segment_s * samplerate)
+        self.min_pause_ms = min_pause_ms
+        self.poll_s = poll_s
+        self.trim = trim
+        self.committed = 0  # samples already transcribed
+        self.texts = []
+        self.segments = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    @property
+    def prompt(self):
+        return " ".join(self.texts)[-PROMPT_CHARS:] or None
+
+    def _run(self):
+        while not self._stop.wait(self.poll_s):
+            pending = self.buffer.view()[self.committed:]
+            if len(pending) < self.min_segment:
+                continue
+            cut = find_pause(pending[:self.max_segment], self.samplerate, self.min_pause_ms)
+            if cut is None or cut < self.min_segment:
+                if len(pending) < self.max_segment:
+                    continue
+                cut = self.max_segment
+            try:
+                self._transcribe(pending[:cut])
+            except TranscriptionCancelled:
+                return  # recording discarded
+            self.committed += cut
+
+    def _transcribe(self, audio):
+        if self.trim:
+            audio, _ = trim_silence(audio, self.samplerate)
+        if not audio.size:
+            return
+        start = time.perf_counter()
+        text = self.transcribe_fn(audio, self.prompt).strip()
+        self.segments += 1
+        print(
+            f"[INCREMENTAL] Segment {self.segments}: {len(audio) / self.samplerate:.1f}s "
+            f"in {time.perf_counter() - start:.2f}s '{text[:40]}'"
+        )
+        if text:
+            self.texts.append(text)
+
+    def stop(self):
+        """Stop polling for new segments (non-blocking)"""
+        self._stop.set()
+
+    def finish(self):
+        """Stop polling, transcribe the remaining tail and return the full text"""
+        self.stop()
+        self._thread.join()
+        tail = self.buffer.view()[self.committed:]
+        if len(tail):
+            self._transcribe(np.asarray(tail))
+            self.committed += len(tail)
+        return " ".join(self.texts)
+
+
+def _normalize_word(word):
+    return word.strip().strip(".,!?;:\"'").lower()
+
+
+def _same_word(a, b, slack=0.0):
+    """Two decodes' (start, end, word) for one spoken word: same text, overlapping in time"""
+    return _normalize_word(a[2]) == _normalize_word(b[2]) and a[0] < b[1] + slack and b[0] < a[1] + slack
+
+
+def _repeated_run(tail, head, slack=0.0):
+    """Length of the longest run of words that ends tail and starts head"""
+    for k in range(min(len(tail), len(head)), 0, -1):
+        if all(_same_word(a, b, slack) for a, b in zip(tail[-k:], head[:k])):
+            return k
+    return 0
+
+
+def _join_start(previous, last, words, window, slack):
+    """Index in words (the next shard) of the first word after previous[last]
+
+    The overlapping words of both shards are aligned by text, which holds
+    even where the two decodes disagree on timestamps or a word is
+    repeated. None when previous[last] has no counterpart in words.
+    """
+    low = max(0, last - window + 1)
+    ours = [_normalize_word(w[2]) for w in previous[low:]]
+    theirs = [_normalize_word(w[2]) for w in words[:3 * window]]
+    for i, j, size in SequenceMatcher(None, ours, theirs, autojunk=False).get_matching_blocks():
+        if i <= last - low < i + size:
+            j += last - low - i
+            # A lone common word ("the") only counts where it is also at the same time
+            if size > 1 or _same_word(previous[last], words[j], slack):
+                return j + 1
+    return None
+
+
+def stitch_shards(shards, cuts, window=8, slack=SHARD_JITTER_S):
+    """Merge word-timestamped shard transcripts into one text
+
+    shards[i] is a list of (start, end, word) in file time for shard i,
+    which overlaps its neighbours around cuts[i - 1] and cuts[i]. Each
+    shard keeps its words up to the one whose midpoint is the last before
+    its closing cut, and the next shard continues right after that word,
+    found by aligning the overlapping words of both shards by text. The
+    join is decided once, so a word straddling the cut is neither lost
+    nor doubled when the two decodes place it slightly differently, and
+    words the speaker really said twice stay. Without a text match the
+    next shard continues after the end time of the last kept word, minus
+    any leading run that repeats it within slack seconds.
+    """
+    merged = []
+    previous, last = [], -1
+    for i, words in enumerate(shards):
+        high = cuts[i] if i < len(cuts) else float("inf")
+        if merged:
+            start = _join_start(previous, last, words, window, slack) if last >= 0 else None
+            if start is None:
+                words = [w for w in words if (w[0] + w[1]) / 2 > merged[-1][1] - slack]
+                start = _repeated_run(merged[-window:], words[:window], slack)
+            words = words[start:]
+        kept = [w for w in words if (w[0] + w[1]) / 2 < high]
+        merged += kept
+        previous, last = words, (words.index(kept[-1]) if kept else -1)
+    return "".join(w[2] for w in merged).strip()
+
+
+class LiveDictation:
+    """Type confirmed words at the cursor while the user is still speaking
+
+    Re-decodes the audio since the last confirmed words every step_s and
+    applies a local-agreement policy: a word is confirmed once two
+    consecutive hypotheses agree on it and on everything before it. Only
+    confirmed words are passed to on_words, so revisions of the unstable
+    tail never reach the target app. The decode window slides past
+    confirmed audio once it grows beyond max_window_s.
+
+    transcribe_fn(audio, prompt) must return a Whisper result decoded with
+    word_timestamps=True.
+    """
+
+    def __init__(self, buffer, transcribe_fn, on_words, step_s=1.0, max_window_s=15.0,
+                 samplerate=WHISPER_SAMPLE_RATE):
+        self.buffer = buffer
+        self.transcribe_fn = transcribe_fn
+        self.on_words = on_words
+        self.samplerate = samplerate
+        self.step = int(step_s * samplerate)
+        self.max_window = int(max_window_s * samplerate)
+        self.window_start = 0  # sample where the decode window begins
+        self.decoded_upto = 0
+        self.confirmed = []
+        self.confirmed_words = []  # (start, end, word) in recording time
+        self.confirmed_end = 0.0  # seconds
+        self.hypothesis = []
+        self.first_word_time = None
+        self._start_time = time.perf_counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._start_time = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        """Stop decoding new audio (non-blocking)"""
+        self._stop.set()
+
+    def finish(self):
+        """Decode the remaining audio, confirm everything left and return the full text"""
+        self.stop()
+        self._thread.join()
+        if len(self.buffer) > self.window_start:
+            self._step(final=True)
+        return "".join(self.confirmed).strip()
+
+    def _run(self):
+        while not self._stop.wait(0.05):
+            if len(self.buffer) - self.decoded_upto >= self.step:
+                try:
+                    self._step()
+                except TranscriptionCancelled:
+                    return  # recording discarded
+
+    def _step(self, final=False):
+        audio = np.asarray(self.buffer.view()[self.window_start:])
+        self.decoded_upto = self.window_start + len(audio)
+        offset = self.window_start / self.samplerate
+        prompt = "".join(self.confirmed)[-PROMPT_CHARS:] or None
+        result = self.transcribe_fn(audio, prompt)
+
+        # Timestamps jitter between decodes, so words just before confirmed_end
+        # are kept here and dropped below by text if they were already typed
+        words = [
+            (w["word"], w["start"] + offset, w["end"] + offset)
+            for segment in result["segments"]
+            for w in segment.get("words", [])
+            if (w["start"] + w["end"]) / 2 + offset > self.confirmed_end - LIVE_MARGIN_S
+        ]
+        words = words[self._retyped([(start, end, word) for word, start, end in words]):]
+        # A window about to leave Whisper's 30 s context is confirmed as-is
+        if final or len(audio) >= 2 * self.max_window:
+            agreed = words
+        else:
+            agreed = []
+            for previous, current in zip(self.hypothesis, words):
+                if _normalize_word(previous[0]) != _normalize_word(current[0]):
+                    break
+                agreed.append(current)
+        self.hypothesis = words[len(agreed):]
+
+        if agreed:
+            self._confirm(agreed)
+        if len(audio) > self.max_window and self.confirmed_end - LIVE_MARGIN_S > offset:
+            # Slide the window past confirmed speech so decode cost stays bounded; the
+            # margin keeps a word straddling confirmed_end whole in the next window
+            self.window_start = int((self.confirmed_end - LIVE_MARGIN_S) * self.samplerate)
+
+    def _retyped(self, words):
+        """Length of the leading run of words that repeats the last confirmed words
+
+        A repeat only counts when it also overlaps the typed word in time,
+        so a word the speaker really said twice is still typed.
+        """
+        return _repeated_run(self.confirmed_words[-len(words):], words, LIVE_JITTER_S) if words else 0
+
+    def _confirm(self, words):
+        text = "".join(word for word, _, _ in words)
+        if not self.confirmed:
+            text = text.lstrip()
+            self.first_word_time = time.perf_counter() - self._start_time
+            print(f"[LIVE] First word typed {self.first_word_time:.2f}s after start")
+        self.confirmed.append(text)
+        # Only the tail is ever compared against a new hypothesis
+        self.confirmed_words = (self.confirmed_words + [(start, end, word) for word, start, end in words])[-64:]
+        self.confirmed_end = words[-1][2]
+        self.on_words(text)
@@ -0,0 +1,208 @@
+"""Energy + zero-crossing voice activity detection for recorded audio"""
+import numpy as np
+
+from audio_utils import WHISPER_SAMPLE_RATE
+
+FRAME_MS = 20
+
+# Frames quieter than this are never speech (dBFS)
+SPEECH_FLOOR_DB = -50.0
+# Speech must rise this far above the noise floor (10th percentile energy)
+SPEECH_MARGIN_DB = 10.0
+# Clips whose loud and quiet frames differ by less than this are treated as noise
+MIN_DYNAMIC_RANGE_DB = 6.0
+# Low-energy frames with this many sign changes per sample count as fricatives
+FRICATIVE_ZCR = 0.3
+# Speech bursts shorter than this are clicks/bumps
+MIN_SPEECH_MS = 60
+# Silence kept around each speech segment
+PAD_MS = 200
+# Internal pauses longer than this are shortened to this length
+MAX_PAUSE_MS = 600
+
+
+def frame_features(audio, samplerate=WHISPER_SAMPLE_RATE, frame_ms=FRAME_MS):
+    """Per-frame energy (dBFS) and zero-crossing rate"""
+    frame_len = samplerate * frame_ms // 1000
+    n_frames = len(audio) // frame_len
+    frames = np.asarray(audio[:n_frames * frame_len], dtype=np.float32).reshape(n_frames, frame_len)
+    energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame_len
+    return energy_db, zcr
+
+
+def _runs(mask):
+    """Start/end indices (end exclusive) of the True runs in a boolean array"""
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def speech_mask(audio, samplerate=WHISPER_SAMPLE_RATE, frame_ms=FRAME_MS):
+    """Boolean speech/non-speech decision per frame"""
+    energy_db, zcr = frame_features(audio, samplerate, frame_ms)
+    if energy_db.size == 0:
+        return np.zeros(0, dtype=bool)
+
+    noise_db = np.percentile(energy_db, 10)
+    peak_db = np.percentile(energy_db, 99)
+    if peak_db < SPEECH_FLOOR_DB or peak_db - noise_db < MIN_DYNAMIC_RANGE_DB:
+        return np.zeros(energy_db.size, dtype=bool)
+
+    # Adaptive threshold, capped below the peak so steady loud speech survives
+    threshold = max(SPEECH_FLOOR_DB, min(noise_db + SPEECH_MARGIN_DB, peak_db - 20.0))
+    voiced = energy_db > threshold
+    fricative = (energy_db > threshold - 6.0) & (zcr > FRICATIVE_ZCR)
+    mask = voiced | fricative
+
+    # Drop blips that are too short to be speech
+    starts, ends = _runs(mask)
+    min_frames = max(1, MIN_SPEECH_MS // frame_ms)
+    for start, end in zip(starts, ends):
+        if end - start < min_frames:
+            mask[start:end] = False
+    return mask
+
+
+def speech_segments(audio, samplerate=WHISPER_SAMPLE_RATE, pad_ms=PAD_MS, frame_ms=FRAME_MS):
+    """Padded (start, end) sample ranges of speech, merged where they overlap"""
+    mask = speech_mask(audio, samplerate, frame_ms)
+    frame_len = samplerate * frame_ms // 1000
+    pad = pad_ms * samplerate // 1000
+    segments = []
+    for start, end in zip(*_runs(mask)):
+        start = max(0, start * frame_len - pad)
+        end = len(audio) if end == mask.size else min(len(audio), end * frame_len + pad)
+        if segments and start <= segments[-1][1]:
+            segments[-1] = (segments[-1][0], end)
+        else:
+            segments.append((start, end))
+    return segments
+
+
+def trim_silence(audio, samplerate=WHISPER_SAMPLE_RATE, max_pause_ms=MAX_PAUSE_MS):
+    """Trim leading/trailing silence and shorten long internal pauses
+
+    Returns (audio, info). The returned audio is empty when no speech was
+    found; info holds input/output/removed seconds.
+    """
+    segments = speech_segments(audio, samplerate)
+    max_pause = max_pause_ms * samplerate // 1000
+
+    pieces = []
+    for i, (start, end) in enumerate(segments):
+        if i and start - segments[i - 1][1] > max_pause:
+            # Keep a short stretch of the pause so Whisper still sees a break
+            pieces.append(audio[segments[i - 1][1]:segments[i - 1][1] + max_pause // 2])
+            pieces.append(audio[start - max_pause // 2:start])
+        elif i:
+            pieces.append(audio[segments[i - 1][1]:start])
+        pieces.append(audio[start:end])
+
+    trimmed = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+    info = {
+        "input_seconds": len(audio) / samplerate,
+        "output_seconds": len(trimmed) / samplerate,
+        "removed_seconds": (len(audio) - len(trimmed)) / samplerate,
+        "segments": len(segments),
+    }
+    return trimmed, info
+
+
+class SilenceTracker:
+    """Incremental trailing-silence detector used for hands-free auto-stop
+
+    Fed with 16 kHz blocks as they are captured. update() returns True
+    once speech has been heard and then followed by silence_ms of
+    non-speech. As in speech_mask, only runs of at least MIN_SPEECH_MS
+    count as speech, so clicks and bumps before the first word do not
+    arm it. The noise floor follows the quietest frames and drifts up
+    slowly so a noisier room does not keep the recording open forever.
+    """
+
+    NOISE_RISE_DB_PER_S = 3.0
+
+    def __init__(self, silence_ms=1000, samplerate=WHISPER_SAMPLE_RATE, frame_ms=FRAME_MS):
+        self.samplerate = samplerate
+        self.frame_ms = frame_ms
+        self.frame_len = samplerate * frame_ms // 1000
+        self.silence_frames = max(1, silence_ms // frame_ms)
+        self.min_speech_frames = max(1, MIN_SPEECH_MS // frame_ms)
+        self.reset()
+
+    def reset(self):
+        self._pending = np.zeros(0, dtype=np.float32)
+        self.noise_db = None
+        self.heard_speech = False
+        self.speech_run = 0  # consecutive speech frames, carried across blocks
+        self.silent_frames = 0
+        self.triggered = False
+
+    def update(self, samples):
+        """Feed samples; returns True when trailing silence has been reached"""
+        samples = np.concatenate([self._pending, np.asarray(samples, dtype=np.float32)])
+        usable = len(samples) - len(samples) % self.frame_len
+        self._pending = samples[usable:]
+        if not usable:
+            return self.triggered
+
+        energy_db, zcr = frame_features(samples[:usable], self.samplerate, self.frame_ms)
+        quietest = float(np.percentile(energy_db, 10))
+        if self.noise_db is None:
+            self.noise_db = quietest
+        else:
+            drift = self.NOISE_RISE_DB_PER_S * usable / self.samplerate
+            self.noise_db = min(self.noise_db + drift, quietest)
+
+        threshold = max(SPEECH_FLOOR_DB, self.noise_db + SPEECH_MARGIN_DB)
+        speech = (energy_db > threshold) | ((energy_db > threshold - 6.0) & (zcr > FRICATIVE_ZCR))
+        for is_speech in speech:
+            if is_speech:
+                self.speech_run += 1
+                self.silent_frames = 0
+                if self.speech_run >= self.min_speech_frames:
+                    self.heard_speech = True
+            else:
+                self.speech_run = 0
+                self.silent_frames += 1
+
+        if self.heard_speech and self.silent_frames >= self.silence_frames:
+            self.triggered = True
+        return self.triggered
+
+
+def find_pause(audio, samplerate=WHISPER_SAMPLE_RATE, min_pause_ms=400, frame_ms=FRAME_MS):
+    """Sample index in the middle of the last pause of at least min_pause_ms
+
+    Returns None when the audio holds no speech or no long enough pause
+    follows it.
+    """
+    mask = speech_mask(audio, samplerate, frame_ms)
+    if not mask.any():
+        return None
+    frame_len = samplerate * frame_ms // 1000
+    min_frames = max(1, min_pause_ms // frame_ms)
+    starts, ends = _runs(~mask)
+    # Only pauses that come after some speech are useful cut points
+    long_enough = (ends - starts >= min_frames) & (starts > 0)
+    if not long_enough.any():
+        return None
+    start, end = starts[long_enough][-1], ends[long_enough][-1]
+    return (start + end) // 2 * frame_len
+
+
+def find_pause_near(audio, position, samplerate=WHISPER_SAMPLE_RATE, min_pause_ms=300, frame_ms=FRAME_MS):
+    """Sample index in the middle of the pause closest to position
+
+    Returns None when the audio holds no pause of at least min_pause_ms.
+    Unlike find_pause, leading silence counts too: shard cut points only
+    need to avoid splitting a word.
+    """
+    mask = speech_mask(audio, samplerate, frame_ms)
+    frame_len = samplerate * frame_ms // 1000
+    starts, ends = _runs(~mask)
+    long_enough = ends - starts >= max(1, min_pause_ms // frame_ms)
+    if not long_enough.any():
+        return None
+    middles = (starts[long_enough] + ends[long_enough]) // 2 * frame_len
+    return int(middles[np.argmin(np.abs(middles - position))])